@@ -0,0 +1,194 @@
+# 전국 기상 특보 피드를 주기적으로 받아 주/구역/심각도별 메모리 인덱스로 유지
+from typing import Any, Awaitable, Callable, Iterable
+import asyncio
+import sys
+import time
+
+
+def alert_zones(feature: dict) -> list[str]:
+    """Return the UGC zone codes (e.g. CAZ006) an alert applies to."""
+    return feature.get("properties", {}).get("geocode", {}).get("UGC", []) or []
+
+
+def alert_states(feature: dict) -> set[str]:
+    """Return the state / marine area codes (first two UGC letters) of an alert."""
+    return {zone[:2] for zone in alert_zones(feature)}
+
+
+class AlertsIndex:
+    """In-memory index of active alerts by state, zone and severity.
+
+    ``apply`` updates the index incrementally by alert ID: unchanged alerts
+    are left in place, and only new, updated or expired ones are touched.
+    """
+
+    def __init__(self):
+        self._alerts: dict[str, dict] = {}
+        self._versions: dict[str, Any] = {}
+        self.by_state: dict[str, set[str]] = {}
+        self.by_zone: dict[str, set[str]] = {}
+        self.by_severity: dict[str, set[str]] = {}
+
+    @classmethod
+    def from_features(cls, features: Iterable[dict]) -> "AlertsIndex":
+        index = cls()
+        index.apply(features)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def _add(self, alert_id: str, feature: dict) -> None:
+        self._alerts[alert_id] = feature
+        for state in alert_states(feature):
+            self.by_state.setdefault(state, set()).add(alert_id)
+        for zone in alert_zones(feature):
+            self.by_zone.setdefault(zone, set()).add(alert_id)
+        severity = feature.get("properties", {}).get("severity") or "Unknown"
+        self.by_severity.setdefault(severity, set()).add(alert_id)
+
+    def _remove(self, alert_id: str) -> None:
+        feature = self._alerts.pop(alert_id)
+        self._versions.pop(alert_id, None)
+        for state in alert_states(feature):
+            _discard(self.by_state, state, alert_id)
+        for zone in alert_zones(feature):
+            _discard(self.by_zone, zone, alert_id)
+        severity = feature.get("properties", {}).get("severity") or "Unknown"
+        _discard(self.by_severity, severity, alert_id)
+
+    def apply(self, features: Iterable[dict]) -> dict[str, int]:
+        """Sync the index with a full feed snapshot; return added/updated/removed counts."""
+        seen = set()
+        added = updated = 0
+        for feature in features:
+            props = feature.get("properties", {})
+            alert_id = feature.get("id") or props.get("id")
+            if not alert_id:
+                continue
+            seen.add(alert_id)
+            version = (props.get("sent"), props.get("expires"), props.get("messageType"))
+            if alert_id in self._alerts:
+                if self._versions.get(alert_id) == version:
+                    continue
+                self._remove(alert_id)
+                updated += 1
+            else:
+                added += 1
+            self._add(alert_id, feature)
+            self._versions[alert_id] = version
+        removed = [alert_id for alert_id in self._alerts if alert_id not in seen]
+        for alert_id in removed:
+            self._remove(alert_id)
+        return {"added": added, "updated": updated, "removed": len(removed), "total": len(self._alerts)}
+
+    def query(self, states: Iterable[str] | None = None, zones: Iterable[str] | None = None,
+              severities: Iterable[str] | None = None) -> list[dict]:
+        """Return alerts matching any of the given states/zones and severities, in feed order."""
+        ids: set[str] | None = None
+        if states is not None or zones is not None:
+            ids = set()
+            for state in states or ():
+                ids |= self.by_state.get(state.upper(), set())
+            for zone in zones or ():
+                ids |= self.by_zone.get(zone.upper(), set())
+        if severities is not None:
+            wanted = set()
+            for severity in severities:
+                wanted |= self.by_severity.get(severity.capitalize(), set())
+            ids = wanted if ids is None else ids & wanted
+        if ids is None:
+            return list(self._alerts.values())
+        return [feature for alert_id, feature in self._alerts.items() if alert_id in ids]
+
+
+def _discard(bucket: dict[str, set[str]], key: str, alert_id: str) -> None:
+    ids = bucket.get(key)
+    if ids is not None:
+        ids.discard(alert_id)
+        if not ids:
+            del bucket[key]
+
+
+class AlertsIngester:
+    """Poll the nationwide active-alerts feed in the background and keep an index current."""
+
+    def __init__(self, index: AlertsIndex, fetch: Callable[[str], Awaitable[dict | None]],
+                 url: str, interval: float = 60.0):
+        self.index = index
+        self.fetch = fetch
+        self.url = url
+        self.interval = interval
+        self.last_success: float | None = None
+        self.polls = 0
+        self.failures = 0
+        self._last_data: dict | None = None
+        self._task: asyncio.Task | None = None
+
+    def ready(self) -> bool:
+        """Return True while the index is fresh enough to answer tool calls."""
+        return self.last_success is not None and time.monotonic() - self.last_success < self.interval * 3
+
+    async def poll(self) -> None:
+        """Fetch the feed once and apply it to the index."""
+        self.polls += 1
+        data = await self.fetch(self.url)
+        if not data or "features" not in data:
+            self.failures += 1
+            return
+        # 304 재검증 등으로 같은 응답 객체가 돌아오면 인덱스 갱신 생략
+        if data is not self._last_data:
+            self.index.apply(data["features"])
+            self._last_data = data
+        self.last_success = time.monotonic()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                self.failures += 1
+                print(f"[ERROR] Alerts ingest failed: {e}", file=sys.stderr)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+def page_alerts(features: list[dict], limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """Return one page of alerts and the cursor for the next page (None when done).
+
+    Raises ValueError for a cursor that did not come from a previous page.
+    """
+    start = int(cursor) if cursor else 0
+    if start < 0 or limit < 1:
+        raise ValueError("invalid cursor or limit")
+    end = start + limit
+    return features[start:end], (str(end) if end < len(features) else None)
+
+
+def can_stream(ctx: Any) -> bool:
+    """Return True if the MCP request asked for progress notifications."""
+    if ctx is None:
+        return False
+    meta = ctx.request_context.meta
+    return meta is not None and meta.progressToken is not None
+
+
+async def stream_alerts(ctx: Any, features: list[dict], formatter: Callable[[dict], str]) -> int:
+    """Send each formatted alert as an MCP progress notification; return how many were sent."""
+    total = len(features)
+    for i, feature in enumerate(features, start=1):
+        # 한 건씩 포맷해서 바로 전송하므로 전체 문자열을 메모리에 쌓지 않음
+        await ctx.report_progress(i, total, formatter(feature))
+    return total
@@ -0,0 +1,116 @@
+# /sse, /messages/ 요청을 Starlette 라우트 탐색/Request 객체 없이 처리하는 순수 ASGI 라우터와 도우미
+from typing import Any, Awaitable, Callable, MutableMapping
+from urllib.parse import unquote_plus
+import json
+import re
+
+Scope = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[MutableMapping[str, Any]]]
+Send = Callable[[MutableMapping[str, Any]], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+# 쿼리 문자열 전체를 파싱하지 않고 session_id 값만 추출
+SESSION_QUERY_PATTERN = re.compile(rb"(?:^|&)session_id=([^&]*)")
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+def session_id_from_query(query_string: bytes) -> str | None:
+    """Return the ``session_id`` query parameter, or None if it is missing or empty."""
+    match = SESSION_QUERY_PATTERN.search(query_string)
+    if not match or not match.group(1):
+        return None
+    value = match.group(1).decode("latin-1")
+    return unquote_plus(value) if "%" in value or "+" in value else value
+
+
+def header(scope: Scope, name: bytes) -> bytes | None:
+    """Return the first value of request header ``name`` (lower-case bytes)."""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+async def read_body(receive: Receive, limit: int) -> bytes:
+    """Read the whole request body, raising BodyTooLarge past ``limit`` bytes."""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            raise BodyTooLarge()
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def send_response(send: Send, status: int, body: bytes, content_type: str | bytes | None,
+                        headers: list[tuple[bytes, bytes]] | None = None) -> None:
+    raw_headers = [(b"content-length", str(len(body)).encode())]
+    if content_type:
+        raw_headers.append((b"content-type", content_type.encode() if isinstance(content_type, str) else content_type))
+    if headers:
+        raw_headers.extend(headers)
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send: Send, status: int, payload: Any,
+                    headers: list[tuple[bytes, bytes]] | None = None) -> None:
+    await send_response(send, status, json.dumps(payload).encode(), b"application/json", headers)
+
+
+class MessageRouter:
+    """Pure ASGI middleware dispatching exact paths with a single dict lookup.
+
+    ``routes`` maps a path to ``{method: asgi_app}``; a known path with another
+    method gets 405. Everything else, including lifespan scopes and CORS
+    preflight requests, goes to ``app``. With ``cors`` the routed responses echo
+    the request Origin, as CORSMiddleware does with ``allow_origins=["*"]`` and
+    ``allow_credentials=True``, so the router can sit outside that middleware.
+    """
+
+    def __init__(self, app: ASGIApp, routes: dict[str, dict[str, ASGIApp]], cors: bool = False):
+        self.app = app
+        self.routes = routes
+        self.cors = cors
+        self._allow = {path: ", ".join(sorted(methods)).encode() for path, methods in routes.items()}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            methods = self.routes.get(scope["path"])
+            if methods is not None:
+                handler = methods.get(scope["method"])
+                if handler is None:
+                    if scope["method"] == "OPTIONS":
+                        await self.app(scope, receive, send)
+                        return
+                    await send_json(send, 405, {"error": "Method not allowed"},
+                                    [(b"allow", self._allow[scope["path"]])])
+                    return
+                origin = header(scope, b"origin") if self.cors else None
+                if origin is not None:
+                    send = _with_cors_headers(send, origin)
+                await handler(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+def _with_cors_headers(send: Send, origin: bytes) -> Send:
+    cors_headers = [(b"access-control-allow-origin", origin), (b"access-control-allow-credentials", b"true"),
+                    (b"vary", b"Origin")]
+
+    async def send_with_cors(message):
+        if message["type"] == "http.response.start":
+            message = {**message, "headers": [*message.get("headers", []), *cors_headers]}
+        await send(message)
+
+    return send_with_cors
@@ -0,0 +1,237 @@
+# 많은 날씨 질문을 한 번에 처리하는 배치 에이전트 실행기
+#
+# 파일이나 표준 입력에서 프롬프트를 한 줄씩 읽어 최대 --concurrency개씩 동시에 AssistantAgent로 실행하고,
+# 끝나는 순서대로 결과를 JSONL로 기록합니다. 모델 클라이언트, MCP 연결(stdio 서버 프로세스 하나 또는
+# SSE 세션 하나), 도구 결과 캐시는 모든 실행이 공유하며, 프롬프트마다 지연 시간, 도구 호출 수,
+# 토큰 사용량을 기록하고 마지막에 요약을 출력합니다.
+#
+#   python batch_runner.py prompts.txt -o results.jsonl
+#   cat prompts.jsonl | python batch_runner.py - --concurrency 16 --sse-url http://localhost:8000/sse
+#
+# 입력 한 줄은 프롬프트 문자열이거나 {"id": ..., "prompt": ...} JSON 객체입니다. 해석할 수 없는 줄은
+# 줄 번호와 함께 오류 레코드로 기록하고 다음 줄로 진행합니다.
+from typing import Any, AsyncIterator, Callable, TextIO
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.messages import ToolCallExecutionEvent
+from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
+from autogen_ext.tools.mcp import SseServerParams, StdioServerParams
+from dotenv import load_dotenv
+from mcp_sse_session import SharedSseSession
+from tool_cache import CachingTool, CachingWorkbench, ToolResultCache
+from workbench_pool import McpWorkbenchPool
+
+load_dotenv()
+
+# 동시에 실행할 프롬프트 수
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# 프롬프트 하나의 최대 실행 시간(초) - 넘으면 오류로 기록하고 다음 프롬프트로 진행 (0이면 제한 없음)
+BATCH_PROMPT_TIMEOUT = float(os.getenv("BATCH_PROMPT_TIMEOUT", "300"))
+
+
+def parse_prompt(line: str, number: int) -> tuple[Any, str] | None:
+    """Return ``(id, prompt)`` for one input line, or None for a blank line.
+
+    Raises ValueError for a JSON line that does not parse or has no string ``prompt``.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        item = json.loads(line)
+        if not isinstance(item, dict) or not isinstance(item.get("prompt"), str):
+            raise ValueError('expected {"prompt": "..."}')
+        return item.get("id", number), item["prompt"]
+    return number, line
+
+
+async def read_prompts(source: TextIO) -> AsyncIterator[tuple[Any, str | None, str | None]]:
+    """Yield ``(id, prompt, error)`` from ``source`` without blocking the event loop (stdin may be a slow pipe).
+
+    A line that cannot be parsed is yielded with ``prompt`` None and ``error`` set,
+    so it is recorded as a failure instead of aborting the batch.
+    """
+    number = 0
+    while True:
+        line = await asyncio.to_thread(source.readline)
+        if not line:
+            return
+        number += 1
+        try:
+            prompt = parse_prompt(line, number)
+        except ValueError as e:
+            yield number, None, f"invalid input line {number}: {e}"
+            continue
+        if prompt is not None:
+            yield (*prompt, None)
+
+
+def summarize_messages(messages: list) -> dict[str, int]:
+    """Count tool calls and add up model token usage over one run's messages."""
+    usage = {"tool_calls": 0, "tool_errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for message in messages:
+        if message.models_usage is not None:
+            usage["prompt_tokens"] += message.models_usage.prompt_tokens
+            usage["completion_tokens"] += message.models_usage.completion_tokens
+        if isinstance(message, ToolCallExecutionEvent):
+            usage["tool_calls"] += len(message.content)
+            usage["tool_errors"] += sum(1 for result in message.content if result.is_error)
+    return usage
+
+
+async def run_prompt(make_agent: Callable[[], AssistantAgent], prompt_id: Any, prompt: str,
+                     timeout: float) -> dict[str, Any]:
+    # 에이전트는 대화 상태를 가지므로 프롬프트마다 새로 만들고, 모델 클라이언트와 도구는 공유
+    agent = make_agent()
+    record: dict[str, Any] = {"id": prompt_id, "prompt": prompt, "answer": None, "error": None}
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(agent.run(task=prompt), timeout or None)
+    except asyncio.TimeoutError:
+        record["error"] = f"timed out after {timeout:g}s"
+        messages = []
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        messages = []
+    else:
+        messages = result.messages
+        record["answer"] = messages[-1].to_text() if messages else None
+    record["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    record.update(summarize_messages(messages))
+    return record
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Return the nearest-rank percentile of already sorted values (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def invalid_record(prompt_id: Any, error: str) -> dict[str, Any]:
+    """Return the result record for an input line that could not be parsed."""
+    return {"id": prompt_id, "prompt": None, "answer": None, "error": error, "latency_ms": 0.0,
+            **summarize_messages([])}
+
+
+async def run_batch(prompts: AsyncIterator[tuple[Any, str | None, str | None]], make_agent: Callable[[], AssistantAgent],
+                    output: TextIO, concurrency: int = BATCH_CONCURRENCY,
+                    timeout: float = BATCH_PROMPT_TIMEOUT) -> dict[str, Any]:
+    """Run every prompt with at most ``concurrency`` in flight, writing each record to ``output``.
+
+    Returns a summary of latency, tool calls and token usage over the batch.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    # 입력을 미리 다 읽지 않도록 작은 큐로 읽기와 실행 속도를 맞춤
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    latencies: list[float] = []
+    totals = {"prompts": 0, "errors": 0, "tool_calls": 0, "tool_errors": 0,
+              "prompt_tokens": 0, "completion_tokens": 0}
+    start = time.perf_counter()
+
+    async def worker() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            prompt_id, prompt, error = item
+            if error is not None:
+                record = invalid_record(prompt_id, error)
+            else:
+                record = await run_prompt(make_agent, prompt_id, prompt, timeout)
+                latencies.append(record["latency_ms"])
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            totals["prompts"] += 1
+            totals["errors"] += record["error"] is not None
+            for key in ("tool_calls", "tool_errors", "prompt_tokens", "completion_tokens"):
+                totals[key] += record[key]
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        async for item in prompts:
+            await queue.put(item)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        **totals,
+        "elapsed_s": round(elapsed, 2),
+        "prompts_per_minute": round(totals["prompts"] / elapsed * 60, 1) if elapsed else 0.0,
+        "latency_ms": {"p50": percentile(latencies, 50),
+                       "p95": percentile(latencies, 95),
+                       "max": latencies[-1] if latencies else 0.0},
+    }
+
+
+def create_model_client() -> AzureOpenAIChatCompletionClient:
+    return AzureOpenAIChatCompletionClient(
+        azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
+        model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Run many weather prompts through AssistantAgent concurrently")
+    parser.add_argument("input", nargs="?", default="-", help="prompt file, one prompt per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL result file ('-' for stdout)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="prompts run at the same time")
+    parser.add_argument("--timeout", type=float, default=BATCH_PROMPT_TIMEOUT, help="seconds per prompt (0: none)")
+    parser.add_argument("--sse-url", help="use this MCP SSE server instead of starting weather.py over stdio")
+    parser.add_argument("--sse-header", action="append", default=[], metavar="NAME: VALUE",
+                        help="HTTP header for the SSE server (repeatable)")
+    args = parser.parse_args()
+
+    model_client = create_model_client()
+    cache = ToolResultCache()
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    def agent_factory(**tools) -> Callable[[], AssistantAgent]:
+        return lambda: AssistantAgent(name="weather_assistant", model_client=model_client,
+                                      reflect_on_tool_use=True, **tools)
+
+    try:
+        if args.sse_url:
+            headers = dict(h.split(":", 1) for h in args.sse_header)
+            headers = {name.strip(): value.strip() for name, value in headers.items()}
+            async with SharedSseSession(SseServerParams(url=args.sse_url, headers=headers)) as shared:
+                tools = [CachingTool(adapter, cache) for adapter in await shared.adapters()]
+                summary = await run_batch(read_prompts(source), agent_factory(tools=tools), output,
+                                          args.concurrency, args.timeout)
+        else:
+            # MCP 세션은 동시 요청을 처리하므로 서버 프로세스 하나를 모든 실행이 공유
+            params = StdioServerParams(command=sys.executable, args=["weather.py"], read_timeout_seconds=60)
+            async with McpWorkbenchPool(params, size=1) as pool, pool.lease() as workbench:
+                summary = await run_batch(read_prompts(source),
+                                          agent_factory(workbench=CachingWorkbench(workbench, cache)),
+                                          output, args.concurrency, args.timeout)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+        await model_client.close()
+
+    summary["tool_cache"] = cache.stats()
+    print(f"[배치 요약] {json.dumps(summary, ensure_ascii=False)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+# NWS 응답 디코딩 마이크로 벤치마크: 파싱 시간과 최대 RSS 비교
+#
+#   python bench/bench_json.py                # bench/fixtures/*.json 전체
+#   python bench/bench_json.py --scale 20     # 특보 feature를 20배로 늘려 대규모 이벤트 재현
+#
+# 저장소의 fixture는 NWS 응답 형태만 흉내 낸 합성 데이터입니다. 결과를 인용하기 전에
+# bench/record_fixtures.py로 실제 응답을 녹화해 교체하세요.
+import argparse
+import gc
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import nws_json  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "bench", "fixtures")
+
+
+def load_payload(path: str, scale: int) -> bytes:
+    """Read a fixture, repeating its features ``scale`` times."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if scale <= 1:
+        return raw
+    data = json.loads(raw)
+    if "features" in data:
+        data["features"] = data["features"] * scale
+    elif "periods" in data.get("properties", {}):
+        data["properties"]["periods"] = data["properties"]["periods"] * scale
+    return json.dumps(data, indent=4).encode()
+
+
+# 비교할 디코딩 방식
+VARIANTS = {
+    "json": lambda raw: json.loads(raw),
+    "orjson": lambda raw: nws_json.orjson.loads(raw),
+    "json+slim": lambda raw: nws_json.slim(json.loads(raw)),
+    "decode": nws_json.decode,
+}
+
+
+def available_variants() -> list[str]:
+    return [name for name in VARIANTS if name != "orjson" or nws_json.orjson is not None]
+
+
+def time_variant(name: str, raw: bytes, repeat: int) -> float:
+    """Return the best-of-``repeat`` decode time in milliseconds."""
+    fn = VARIANTS[name]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(raw)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def measure(name: str, raw: bytes) -> dict[str, int]:
+    """Run one decode in fresh child processes and return its memory figures in KB.
+
+    ``peak_rss`` is the growth of the process high-water mark; ``heap_peak`` and
+    ``retained`` come from tracemalloc (a separate run, as tracing inflates RSS)
+    and show how much the decoded result keeps alive, e.g. in the response cache.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".json") as f:
+        f.write(raw)
+        f.flush()
+        figures = {}
+        for mode in ("rss", "heap"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", f"{mode}:{name}", f.name],
+                check=True, capture_output=True, text=True,
+            )
+            figures.update(json.loads(out.stdout))
+    return figures
+
+
+def high_water_rss_kb() -> int:
+    """Return the process peak RSS in KB (VmHWM on Linux, else ru_maxrss)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(spec: str, path: str) -> None:
+    mode, name = spec.split(":", 1)
+    with open(path, "rb") as f:
+        raw = f.read()
+    gc.collect()
+    if mode == "rss":
+        before = high_water_rss_kb()
+        result = VARIANTS[name](raw)  # noqa: F841
+        print(json.dumps({"peak_rss": high_water_rss_kb() - before}))
+        return
+    tracemalloc.start()
+    result = VARIANTS[name](raw)  # noqa: F841  (결과를 유지해 캐시에 남는 크기까지 반영)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    print(json.dumps({"heap_peak": peak // 1024, "retained": current // 1024}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark NWS JSON decoding")
+    parser.add_argument("paths", nargs="*", help="fixture files (default: bench/fixtures/*.json)")
+    parser.add_argument("--scale", type=int, default=1, help="repeat features/periods N times")
+    parser.add_argument("--repeat", type=int, default=20, help="timing repetitions per variant")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.paths[0])
+        return
+
+    paths = args.paths or sorted(glob.glob(os.path.join(FIXTURES, "*.json")))
+    print(f"orjson: {'available' if nws_json.orjson is not None else 'not installed'}")
+    print(f"{'payload':<34} {'size':>9} {'variant':<10} {'parse ms':>9} "
+          f"{'peak RSS KB':>12} {'heap peak KB':>13} {'retained KB':>12}")
+    for path in paths:
+        raw = load_payload(path, args.scale)
+        for name in available_variants():
+            ms = time_variant(name, raw, args.repeat)
+            m = measure(name, raw)
+            print(f"{os.path.basename(path):<34} {len(raw):>9} {name:<10} {ms:>9.2f} "
+                  f"{m['peak_rss']:>12} {m['heap_peak']:>13} {m['retained']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# /messages/ 메시지당 라우팅 오버헤드 마이크로 벤치마크 (네트워크/uvicorn 제외, ASGI 앱을 직접 호출)
+#
+#   python bench/bench_router.py                    # 기본 20000개 메시지
+#   python bench/bench_router.py --origin           # 브라우저처럼 Origin 헤더 포함 (CORS 처리 경로)
+#
+# 세 경로 모두 같은 내부 앱(본문을 읽고 202를 반환하는 SseServerTransport.handle_post_message 대역)을 호출합니다.
+#   direct  내부 앱을 바로 호출 (기준선)
+#   shim    이전 handle_messages: CORS -> Starlette 라우트 탐색 -> Request -> scope 복사 -> request._send
+#   router  현재 구조: MessageRouter(dict 조회, CORS 헤더 직접 추가) -> session_id 추출 -> 내부 앱
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware.cors import CORSMiddleware  # noqa: E402
+from starlette.responses import JSONResponse, PlainTextResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from asgi_router import MessageRouter, send_json, session_id_from_query  # noqa: E402
+
+SESSION_ID = "0123456789abcdef0123456789abcdef"
+BODY = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                   "params": {"name": "get_alerts", "arguments": {"state": "CA"}}}).encode()
+
+
+async def accept(scope, receive, send):
+    """Stand-in for handle_post_message: read the body and answer 202."""
+    more = True
+    while more:
+        message = await receive()
+        more = message.get("more_body", False)
+    await send({"type": "http.response.start", "status": 202, "headers": [(b"content-length", b"8")]})
+    await send({"type": "http.response.body", "body": b"Accepted"})
+
+
+async def placeholder(request):
+    return PlainTextResponse("")
+
+
+def add_cors(app: Starlette) -> None:
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
+                       allow_methods=["*"], allow_headers=["*"])
+
+
+def shim_app() -> Starlette:
+    """The previous handle_messages, reproduced for comparison."""
+    app = Starlette()
+    add_cors(app)
+
+    async def response_already_sent(scope, receive, send):
+        pass
+
+    async def handle_messages(request):
+        session_id = request.query_params.get('session_id')
+        if not session_id:
+            return JSONResponse({"error": "session_id required"}, status_code=400)
+        new_scope = dict(request.scope)
+        new_scope['path'] = f'/messages/{session_id}'
+        new_scope['path_info'] = f'/messages/{session_id}'
+        new_scope['query_string'] = f'session_id={session_id}'.encode()
+        await accept(new_scope, request.receive, request._send)
+        return response_already_sent
+
+    # 이전 create_app과 같은 순서의 라우트 목록
+    app.routes.append(Route("/sse", placeholder, methods=["GET"]))
+    app.routes.append(Route("/messages/", handle_messages, methods=["POST"]))
+    app.routes.append(Route("/mcp", placeholder, methods=["POST"]))
+    app.routes.append(Route("/health", placeholder, methods=["GET"]))
+    app.routes.append(Route("/metrics", placeholder, methods=["GET"]))
+    return app
+
+
+def router_app() -> Starlette:
+    app = Starlette()
+
+    async def handle_messages(scope, receive, send):
+        session_id = session_id_from_query(scope["query_string"])
+        if not session_id:
+            return await send_json(send, 400, {"error": "session_id required"})
+        await accept(scope, receive, send)
+
+    app.routes.append(Route("/mcp", placeholder, methods=["POST"]))
+    app.routes.append(Route("/health", placeholder, methods=["GET"]))
+    app.routes.append(Route("/metrics", placeholder, methods=["GET"]))
+    add_cors(app)
+    app.add_middleware(MessageRouter, routes={"/sse": {"GET": accept}, "/messages/": {"POST": handle_messages}},
+                       cors=True)
+    return app
+
+
+def make_scope(origin: bool) -> dict:
+    headers = [(b"host", b"127.0.0.1:8000"), (b"content-type", b"application/json"),
+               (b"content-length", str(len(BODY)).encode())]
+    if origin:
+        headers.append((b"origin", b"https://example.com"))
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/messages/", "raw_path": b"/messages/", "root_path": "",
+        "query_string": f"session_id={SESSION_ID}".encode(), "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+
+
+async def time_app(app, messages: int, origin: bool) -> float:
+    """Return the mean time per message in microseconds."""
+    statuses = []
+
+    async def receive():
+        return {"type": "http.request", "body": BODY, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    scope = make_scope(origin)
+    # uvicorn처럼 요청마다 새 scope를 넘김 (shim이 scope를 수정해도 다음 요청에 영향 없도록)
+    scopes = [dict(scope) for _ in range(messages)]
+    start = time.perf_counter()
+    for s in scopes:
+        await app(s, receive, send)
+    elapsed = time.perf_counter() - start
+    if statuses.count(202) != messages:
+        raise RuntimeError(f"unexpected statuses: {set(statuses)}")
+    return elapsed / messages * 1e6
+
+
+async def run(args) -> dict:
+    variants = {"direct": accept, "shim": shim_app(), "router": router_app()}
+    results = {}
+    for name, app in variants.items():
+        await time_app(app, min(1000, args.messages), args.origin)  # 워밍업
+        results[name] = min([await time_app(app, args.messages, args.origin) for _ in range(args.repeat)])
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark /messages/ routing overhead per message")
+    parser.add_argument("--messages", type=int, default=20000, help="messages per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per variant (best is reported)")
+    parser.add_argument("--origin", action="store_true", help="send an Origin header (CORS path)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    base = results["direct"]
+    print(f"{'variant':<8} {'us/msg':>8} {'overhead us':>12}")
+    for name, us in results.items():
+        print(f"{name:<8} {us:>8.2f} {us - base:>12.2f}")
+    saved = results["shim"] - results["router"]
+    print(f"router removes {saved:.2f} us/msg "
+          f"({saved / (results['shim'] - base) * 100:.0f}% of the shim overhead)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"origin": args.origin, "us_per_message": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# stdio 날씨 서버의 콜드 스타트 측정: 프로세스 실행부터 첫 list_tools 응답까지의 지연과 import 시간 보고서
+#
+#   python bench/bench_startup.py                       # plain(weather.py 직접 실행)과 launcher(fork) 비교
+#   python bench/bench_startup.py --runs 20 --mode plain --json startup.json
+#   python bench/bench_startup.py --imports             # weather import 시간 보고서 (-X importtime)
+#
+# 각 실행은 mcp_client.py의 McpWorkbench와 같은 방식(stdio_client + initialize + list_tools)으로
+# 서버를 새로 띄우고, initialize 완료와 첫 list_tools 응답까지의 시간을 따로 기록합니다.
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from bench_tools import ROOT, percentile
+
+LAUNCHER = os.path.join(ROOT, "weather_launcher.py")
+
+
+def server_parameters(mode: str, socket_path: str) -> StdioServerParameters:
+    if mode == "plain":
+        return StdioServerParameters(command=sys.executable, args=[os.path.join(ROOT, "weather.py")], cwd=ROOT)
+    return StdioServerParameters(command=sys.executable, args=["-S", LAUNCHER, "connect", "--socket", socket_path],
+                                 cwd=ROOT)
+
+
+async def time_startup(params: StdioServerParameters) -> tuple[float, float]:
+    """Return (spawn -> initialized, spawn -> first list_tools) in milliseconds."""
+    start = time.perf_counter()
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                initialized = time.perf_counter()
+                tools = await session.list_tools()
+                listed = time.perf_counter()
+    if not tools.tools:
+        raise RuntimeError("server listed no tools")
+    return (initialized - start) * 1000, (listed - start) * 1000
+
+
+def start_launcher(socket_path: str) -> subprocess.Popen:
+    process = subprocess.Popen([sys.executable, LAUNCHER, "serve", "--socket", socket_path], cwd=ROOT,
+                               stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("weather_launcher.py did not start")
+        time.sleep(0.05)
+    return process
+
+
+async def run(modes: list[str], runs: int) -> dict[str, dict]:
+    socket_path = os.path.join(tempfile.mkdtemp(), "weather-launcher.sock")
+    launcher = start_launcher(socket_path) if "launcher" in modes else None
+    samples: dict[str, dict[str, list[float]]] = defaultdict(lambda: {"initialize_ms": [], "list_tools_ms": []})
+    try:
+        # 모드를 번갈아 실행해 디스크 캐시/CPU 상태 차이가 한쪽에 몰리지 않도록 함
+        for i in range(runs + 1):
+            for mode in modes:
+                initialized, listed = await time_startup(server_parameters(mode, socket_path))
+                if i == 0:
+                    continue  # 워밍업 (파일 시스템 캐시, .pyc 생성)
+                samples[mode]["initialize_ms"].append(initialized)
+                samples[mode]["list_tools_ms"].append(listed)
+    finally:
+        if launcher is not None:
+            launcher.terminate()
+            launcher.wait()
+    results = {}
+    for mode, series in samples.items():
+        results[mode] = {}
+        for name, values in series.items():
+            values.sort()
+            results[mode][name] = {"p50": round(percentile(values, 50), 1), "min": round(values[0], 1),
+                                   "max": round(values[-1], 1)}
+    return results
+
+
+def import_profile(module: str, top: int) -> dict:
+    """Run ``python -X importtime -c 'import module'`` and group self time by top-level package."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                               capture_output=True, text=True, check=True)
+    by_package: dict[str, int] = defaultdict(int)
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        by_package[name.split(".")[0]] += int(self_us)
+        modules.append((int(cumulative_us), name))
+    total = sum(by_package.values())
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "total_ms": round(total / 1000, 1),
+        "packages_ms": {name: round(us / 1000, 1) for name, us in packages},
+        "slowest_cumulative_ms": {name: round(us / 1000, 1) for us, name in sorted(modules, reverse=True)[:top]},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure stdio weather server spawn -> first list_tools latency")
+    parser.add_argument("--mode", choices=("plain", "launcher", "both"), default="both")
+    parser.add_argument("--runs", type=int, default=10, help="timed starts per mode (after one warm-up)")
+    parser.add_argument("--imports", action="store_true", help="print an import time report instead")
+    parser.add_argument("--module", default="weather", help="module for --imports")
+    parser.add_argument("--top", type=int, default=15, help="rows in the import report")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if args.imports:
+        report = import_profile(args.module, args.top)
+        print(f"import {report['module']}: {report['total_ms']} ms (self time, all modules)")
+        print(f"\n{'package':<28} {'self ms':>8}")
+        for name, ms in report["packages_ms"].items():
+            print(f"{name:<28} {ms:>8}")
+        print(f"\n{'module':<44} {'cumulative ms':>14}")
+        for name, ms in report["slowest_cumulative_ms"].items():
+            print(f"{name:<44} {ms:>14}")
+        results = report
+    else:
+        modes = ["plain", "launcher"] if args.mode == "both" else [args.mode]
+        results = asyncio.run(run(modes, args.runs))
+        print(f"{'mode':<10} {'init p50':>9} {'list p50':>9} {'list min':>9} {'list max':>9}  (ms)")
+        for mode, result in results.items():
+            print(f"{mode:<10} {result['initialize_ms']['p50']:>9} {result['list_tools_ms']['p50']:>9} "
+                  f"{result['list_tools_ms']['min']:>9} {result['list_tools_ms']['max']:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# 로컬 NWS 대역 서버를 띄우고 각 transport(stdio / SSE / APIM 호환)로 get_alerts, get_forecast 성능 측정
+#
+#   python bench/bench_tools.py                           # 세 transport 모두, 기본 부하
+#   python bench/bench_tools.py --transport apim --calls 2000 --concurrency 32 --latency-ms 80
+#   python bench/bench_tools.py --cold --json before.json # 서버 캐시 끄고 결과를 JSON으로 저장
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# transport 이름 -> (서버 스크립트, SSE 여부)
+TRANSPORTS = {
+    "stdio": ("weather.py", False),
+    "sse": ("weather_sse.py", True),
+    "apim": ("weather_sse_apim.py", True),
+}
+STATES = ["CA", "NY", "TX", "FL", "WA", "CO", "IL", "AZ"]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def process_memory_kb(pid: int) -> dict[str, int]:
+    """Return current (VmRSS) and peak (VmHWM) RSS of a process, Linux only."""
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split()[:2]
+                    memory[key.rstrip(":")] = int(value)
+    except OSError:
+        pass
+    return memory
+
+
+def find_pid(script: str) -> int | None:
+    """Find the PID of a running ``python <script>`` child (stdio servers are spawned by the MCP client)."""
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                args = f.read().split(b"\0")
+        except OSError:
+            continue
+        if len(args) > 1 and os.path.basename(args[1]) == script.encode():
+            return int(entry)
+    return None
+
+
+async def wait_http(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                async with client.stream("GET", url, timeout=1.0):
+                    return
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not come up within {timeout}s")
+                await asyncio.sleep(0.2)
+
+
+@asynccontextmanager
+async def mcp_session(transport: str, env: dict[str, str], port: int):
+    """Start the server for a transport and yield (ClientSession, server pid)."""
+    script, is_sse = TRANSPORTS[transport]
+    if not is_sse:
+        params = StdioServerParameters(command=sys.executable, args=[script], env=env, cwd=ROOT)
+        with open(os.devnull, "w") as devnull:
+            async with stdio_client(params, errlog=devnull) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    yield session, find_pid(script)
+        return
+
+    server_env = {**env, "PORT": str(port)}
+    proc = subprocess.Popen([sys.executable, script], cwd=ROOT, env=server_env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        await wait_http(f"http://127.0.0.1:{port}/sse")
+        async with sse_client(f"http://127.0.0.1:{port}/sse") as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session, proc.pid
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+async def run_workload(session: ClientSession, calls: int, concurrency: int, coords: int,
+                       forecast_ratio: float, seed: int, call_timeout: float) -> dict[str, list[float] | int]:
+    """Issue ``calls`` tool calls with at most ``concurrency`` in flight."""
+    rng = random.Random(seed)
+    locations = [(round(rng.uniform(30, 45), 4), round(rng.uniform(-120, -80), 4)) for _ in range(coords)]
+    plan = [
+        ("get_forecast", dict(zip(("latitude", "longitude"), rng.choice(locations))))
+        if rng.random() < forecast_ratio else ("get_alerts", {"state": rng.choice(STATES)})
+        for _ in range(calls)
+    ]
+    latencies: dict[str, list[float]] = {"get_alerts": [], "get_forecast": []}
+    errors = 0
+    queue = iter(plan)
+
+    async def worker():
+        nonlocal errors
+        for name, arguments in queue:
+            start = time.perf_counter()
+            try:
+                result = await session.call_tool(name, arguments,
+                                                 read_timeout_seconds=timedelta(seconds=call_timeout))
+                if result.isError:
+                    errors += 1
+                    continue
+            except Exception:
+                errors += 1
+                continue
+            latencies[name].append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {**latencies, "errors": errors, "elapsed": time.perf_counter() - started}
+
+
+def summarize(transport: str, run: dict, memory: dict[str, int]) -> dict:
+    summary = {"transport": transport, "errors": run["errors"],
+               "throughput": sum(len(run[t]) for t in ("get_alerts", "get_forecast")) / run["elapsed"],
+               "rss_kb": memory.get("VmRSS"), "peak_rss_kb": memory.get("VmHWM")}
+    for tool in ("get_alerts", "get_forecast"):
+        values = sorted(run[tool])
+        summary[tool] = {"n": len(values), **{f"p{p}": percentile(values, p) for p in (50, 95, 99)}}
+    return summary
+
+
+def print_table(results: list[dict]) -> None:
+    print(f"{'transport':<9} {'tool':<13} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'calls/s':>8} {'errors':>6} {'RSS MB':>7} {'peak MB':>8}")
+    for r in results:
+        for tool in ("get_alerts", "get_forecast"):
+            t = r[tool]
+            rss = f"{r['rss_kb'] / 1024:.1f}" if r["rss_kb"] else "n/a"
+            peak = f"{r['peak_rss_kb'] / 1024:.1f}" if r["peak_rss_kb"] else "n/a"
+            print(f"{r['transport']:<9} {tool:<13} {t['n']:>6} {t['p50']:>8.2f} {t['p95']:>8.2f} {t['p99']:>8.2f} "
+                  f"{r['throughput']:>8.1f} {r['errors']:>6} {rss:>7} {peak:>8}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark weather MCP tools against a local NWS stand-in")
+    parser.add_argument("--transport", choices=[*TRANSPORTS, "all"], default="all")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--coords", type=int, default=50, help="distinct forecast coordinates")
+    parser.add_argument("--forecast-ratio", type=float, default=0.5)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stand-in upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--cache-control", default="max-age=60", help="Cache-Control sent by the stand-in")
+    parser.add_argument("--cold", action="store_true", help="disable the servers' gridpoint/response caches")
+    parser.add_argument("--standin-port", type=int, default=8081)
+    parser.add_argument("--server-port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--call-timeout", type=float, default=30.0, help="seconds before a call counts as an error")
+    parser.add_argument("--json", help="write results (with git commit) to this file")
+    args = parser.parse_args()
+
+    standin = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "bench", "nws_standin.py"), "--port", str(args.standin_port),
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+         "--error-rate", str(args.error_rate), "--cache-control", args.cache_control],
+        cwd=ROOT,
+    )
+    env = {**os.environ, "NWS_API_BASE": f"http://127.0.0.1:{args.standin_port}"}
+    if args.cold:
+        env.update(NWS_RESPONSE_CACHE_SIZE="0", NWS_GRIDPOINT_CACHE_SIZE="0")
+
+    results = []
+    try:
+        await wait_http(f"http://127.0.0.1:{args.standin_port}/_stats")
+        for transport in (TRANSPORTS if args.transport == "all" else [args.transport]):
+            async with mcp_session(transport, env, args.server_port) as (session, pid):
+                run = await run_workload(session, args.calls, args.concurrency, args.coords,
+                                         args.forecast_ratio, args.seed, args.call_timeout)
+                memory = process_memory_kb(pid) if pid else {}
+            results.append(summarize(transport, run, memory))
+    finally:
+        standin.terminate()
+        standin.wait(timeout=10)
+
+    print_table(results)
+    if args.json:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+        with open(args.json, "w") as f:
+            json.dump({"commit": commit, "args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,365 @@
+# weather_sse_apim.py용 동시 MCP SSE 세션 부하 생성기
+#
+# 실제 MCP SSE 세션(GET /sse -> endpoint 이벤트 -> POST /messages/?session_id=... initialize)을
+# 수천 개 열고, 단계별(ramp) 목표 세션 수를 유지하면서 목표 속도로 도구를 호출합니다.
+#
+#   # 로컬 서버 + NWS 대역 서버를 직접 띄워 측정
+#   python bench/loadgen_sse.py --spawn --stages 30s:500,60s:2000,30s:0 --rate 200
+#   # 이미 실행 중인 서버 (RSS는 --server-pid로 지정 시 측정)
+#   python bench/loadgen_sse.py --url http://127.0.0.1:8000 --server-pid 1234 --stages 60s:1000
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from urllib.parse import urljoin
+
+import httpx
+
+from bench_tools import ROOT, STATES, percentile, process_memory_kb, wait_http
+
+PROTOCOL_VERSION = "2025-06-18"
+
+
+class Stats:
+    """Counters and latency samples, reset per reporting interval where noted."""
+
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+        self.handshake_failures = 0
+        self.dropped = 0
+        self.post_errors = 0
+        self.call_errors = 0
+        self.call_timeouts = 0
+        self.handshake_ms: list[float] = []
+        self.call_ms: list[float] = []
+        # 구간별 샘플
+        self.interval_opened = 0
+        self.interval_call_ms: list[float] = []
+
+    def take_interval(self) -> tuple[int, list[float]]:
+        opened, calls = self.interval_opened, self.interval_call_ms
+        self.interval_opened, self.interval_call_ms = 0, []
+        return opened, calls
+
+
+def parse_sse(lines):
+    """Yield (event, data) pairs from an async iterator of SSE lines."""
+    async def events():
+        event, data = "message", []
+        async for line in lines:
+            if not line:
+                if data:
+                    yield event, "\n".join(data)
+                event, data = "message", []
+            elif line.startswith(":"):
+                continue  # keepalive 주석
+            elif line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].lstrip())
+    return events()
+
+
+class SseSession:
+    """One MCP session over the SSE transport, speaking JSON-RPC directly."""
+
+    def __init__(self, client: httpx.AsyncClient, base_url: str, stats: Stats, call_timeout: float):
+        self.client = client
+        self.base_url = base_url
+        self.stats = stats
+        self.call_timeout = call_timeout
+        self.endpoint: str | None = None
+        self.ready = asyncio.Event()
+        self.pending: dict[int, asyncio.Future] = {}
+        self.ids = itertools.count(1)
+        self.closing = False
+        self.task: asyncio.Task | None = None
+
+    async def _listen(self) -> None:
+        try:
+            async with self.client.stream("GET", urljoin(self.base_url, "/sse"),
+                                          headers={"Accept": "text/event-stream"}) as response:
+                response.raise_for_status()
+                async for event, data in parse_sse(response.aiter_lines()):
+                    if event == "endpoint":
+                        self.endpoint = urljoin(self.base_url, data)
+                        self.ready.set()
+                    elif event == "message":
+                        message = json.loads(data)
+                        future = self.pending.pop(message.get("id"), None)
+                        if future is not None and not future.done():
+                            future.set_result(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        finally:
+            if not self.closing and self.ready.is_set():
+                self.stats.dropped += 1
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("stream closed"))
+                    future.exception()  # POST 중 실패해 await되지 않는 경우의 경고 방지
+
+    async def _post(self, message: dict) -> None:
+        response = await self.client.post(self.endpoint, json=message)
+        if response.status_code >= 300:
+            self.stats.post_errors += 1
+            raise ConnectionError(f"POST returned {response.status_code}")
+
+    async def request(self, method: str, params: dict) -> dict:
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            await self._post({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            return await asyncio.wait_for(future, self.call_timeout)
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def open(self) -> None:
+        start = time.perf_counter()
+        self.task = asyncio.create_task(self._listen())
+        await asyncio.wait_for(self.ready.wait(), self.call_timeout)
+        await self.request("initialize", {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "loadgen-sse", "version": "1.0"},
+        })
+        await self._post({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        self.stats.handshake_ms.append((time.perf_counter() - start) * 1000)
+
+    async def call_tool(self, name: str, arguments: dict) -> None:
+        start = time.perf_counter()
+        try:
+            message = await self.request("tools/call", {"name": name, "arguments": arguments})
+        except asyncio.TimeoutError:
+            self.stats.call_timeouts += 1
+            return
+        except Exception:
+            if not self.closing:  # 램프다운으로 닫은 세션의 미완료 호출은 오류로 세지 않음
+                self.stats.call_errors += 1
+            return
+        if "error" in message or message.get("result", {}).get("isError"):
+            self.stats.call_errors += 1
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stats.call_ms.append(elapsed)
+        self.stats.interval_call_ms.append(elapsed)
+
+    async def close(self) -> None:
+        self.closing = True
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+def parse_stages(text: str) -> list[tuple[float, int]]:
+    """Parse "30s:500,60s:2000,30s:0" into (duration seconds, target sessions) stages."""
+    stages = []
+    for part in text.split(","):
+        duration, target = part.split(":")
+        seconds = float(duration[:-1]) * 60 if duration.endswith("m") else float(duration.rstrip("s"))
+        stages.append((seconds, int(target)))
+    return stages
+
+
+def target_sessions(stages: list[tuple[float, int]], elapsed: float) -> int | None:
+    """Linearly interpolate the session target at ``elapsed``; None once all stages are done."""
+    previous = 0
+    for duration, target in stages:
+        if elapsed < duration:
+            return round(previous + (target - previous) * elapsed / duration)
+        elapsed -= duration
+        previous = target
+    return None
+
+
+def raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def random_call(rng: random.Random) -> tuple[str, dict]:
+    if rng.random() < 0.5:
+        return "get_alerts", {"state": rng.choice(STATES)}
+    return "get_forecast", {"latitude": round(rng.uniform(30, 45), 2), "longitude": round(rng.uniform(-120, -80), 2)}
+
+
+async def run(args: argparse.Namespace, server_pid: int | None) -> dict:
+    stats = Stats()
+    stages = parse_stages(args.stages)
+    rng = random.Random(args.seed)
+    client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=args.post_connections),
+        timeout=httpx.Timeout(args.call_timeout, read=None),
+    )
+    sessions: list[SseSession] = []
+    opening: set[asyncio.Task] = set()
+    calls: set[asyncio.Task] = set()
+    handshake_limit = asyncio.Semaphore(args.handshake_concurrency)
+    baseline_rss = process_memory_kb(server_pid).get("VmRSS") if server_pid else None
+    peak_sessions = 0
+    report_rows = []
+
+    async def open_one():
+        async with handshake_limit:
+            session = SseSession(client, args.url, stats, args.call_timeout)
+            try:
+                await session.open()
+            except asyncio.CancelledError:
+                await session.close()
+                raise
+            except Exception:
+                stats.handshake_failures += 1
+                await session.close()
+                return
+        stats.opened += 1
+        stats.interval_opened += 1
+        sessions.append(session)
+
+    started = time.monotonic()
+    next_report = started + args.report_interval
+    call_credit = 0.0
+    last_tick = started
+    print(f"{'t':>5} {'target':>6} {'open':>6} {'sess/s':>7} {'calls/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'dropped':>7} {'errors':>6} {'RSS MB':>7} {'KB/sess':>8}")
+    try:
+        while True:
+            now = time.monotonic()
+            target = target_sessions(stages, now - started)
+            if target is None:
+                break
+            # 목표 세션 수에 맞춰 세션 열기/닫기
+            deficit = target - len(sessions) - len(opening)
+            for _ in range(max(0, deficit)):
+                task = asyncio.create_task(open_one())
+                opening.add(task)
+                task.add_done_callback(opening.discard)
+            for _ in range(max(0, -deficit)):
+                if sessions:
+                    session = sessions.pop(rng.randrange(len(sessions)))
+                    stats.closed += 1
+                    asyncio.create_task(session.close())
+            # 드롭된 세션은 목록에서 제거 (다음 틱에 다시 채움)
+            sessions[:] = [s for s in sessions if not s.task.done()]
+            peak_sessions = max(peak_sessions, len(sessions))
+
+            # 목표 호출 속도 유지
+            call_credit += args.rate * (now - last_tick)
+            last_tick = now
+            while call_credit >= 1 and sessions:
+                call_credit -= 1
+                task = asyncio.create_task(rng.choice(sessions).call_tool(*random_call(rng)))
+                calls.add(task)
+                task.add_done_callback(calls.discard)
+            call_credit = min(call_credit, args.rate)  # 세션이 없을 때 밀린 호출이 폭주하지 않도록
+
+            if now >= next_report:
+                opened, call_ms = stats.take_interval()
+                call_ms.sort()
+                rss = process_memory_kb(server_pid).get("VmRSS") if server_pid else None
+                per_session = (rss - baseline_rss) / len(sessions) if rss and baseline_rss and sessions else None
+                row = {
+                    "t": round(now - started), "target": target, "open": len(sessions),
+                    "sessions_per_s": opened / args.report_interval,
+                    "calls_per_s": len(call_ms) / args.report_interval,
+                    "p50_ms": percentile(call_ms, 50), "p95_ms": percentile(call_ms, 95),
+                    "dropped": stats.dropped, "errors": stats.call_errors + stats.call_timeouts,
+                    "rss_kb": rss, "kb_per_session": per_session,
+                }
+                report_rows.append(row)
+                print(f"{row['t']:>5} {target:>6} {len(sessions):>6} {row['sessions_per_s']:>7.1f} "
+                      f"{row['calls_per_s']:>8.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                      f"{row['dropped']:>7} {row['errors']:>6} "
+                      f"{(rss or 0) / 1024:>7.1f} {per_session if per_session is not None else float('nan'):>8.1f}")
+                next_report = now + args.report_interval
+            await asyncio.sleep(0.05)
+    finally:
+        for task in opening | calls:
+            task.cancel()
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+        await client.aclose()
+
+    call_ms = sorted(stats.call_ms)
+    handshake_ms = sorted(stats.handshake_ms)
+    summary = {
+        "sessions_opened": stats.opened, "peak_sessions": peak_sessions,
+        "handshake_failures": stats.handshake_failures, "dropped_streams": stats.dropped,
+        "post_errors": stats.post_errors, "call_errors": stats.call_errors, "call_timeouts": stats.call_timeouts,
+        "calls": len(call_ms),
+        "handshake_p50_ms": percentile(handshake_ms, 50), "handshake_p95_ms": percentile(handshake_ms, 95),
+        "call_p50_ms": percentile(call_ms, 50), "call_p95_ms": percentile(call_ms, 95),
+        "call_p99_ms": percentile(call_ms, 99),
+        "server_peak_rss_kb": process_memory_kb(server_pid).get("VmHWM") if server_pid else None,
+        "intervals": report_rows,
+    }
+    print("\n=== Summary ===")
+    for key, value in summary.items():
+        if key != "intervals":
+            print(f"  {key}: {value:.1f}" if isinstance(value, float) else f"  {key}: {value}")
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent MCP SSE session load generator")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="server base URL (ignored with --spawn)")
+    parser.add_argument("--spawn", action="store_true",
+                        help="start weather_sse_apim.py and the NWS stand-in locally")
+    parser.add_argument("--server-pid", type=int, help="PID of an already running server, for RSS")
+    parser.add_argument("--stages", default="20s:200,40s:200,10s:0",
+                        help="comma-separated <duration>:<target sessions> ramp stages")
+    parser.add_argument("--rate", type=float, default=50.0, help="total tool calls per second")
+    parser.add_argument("--handshake-concurrency", type=int, default=64)
+    parser.add_argument("--post-connections", type=int, default=256, help="keep-alive connections for POSTs")
+    parser.add_argument("--call-timeout", type=float, default=30.0)
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8765, help="server port with --spawn")
+    parser.add_argument("--standin-port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stand-in upstream latency with --spawn")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the summary to this file")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    processes = []
+    server_pid = args.server_pid
+    try:
+        if args.spawn:
+            processes.append(subprocess.Popen(
+                [sys.executable, os.path.join(ROOT, "bench", "nws_standin.py"),
+                 "--port", str(args.standin_port), "--latency-ms", str(args.latency_ms),
+                 "--cache-control", "max-age=60"],
+                cwd=ROOT,
+            ))
+            env = {**os.environ, "PORT": str(args.port), "NWS_API_BASE": f"http://127.0.0.1:{args.standin_port}"}
+            server = subprocess.Popen([sys.executable, "weather_sse_apim.py"], cwd=ROOT, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            processes.append(server)
+            server_pid = server.pid
+            args.url = f"http://127.0.0.1:{args.port}"
+            asyncio.run(wait_http(f"{args.url}/sse"))
+        summary = asyncio.run(run(args, server_pid))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "summary": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
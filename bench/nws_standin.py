@@ -0,0 +1,103 @@
+# bench/fixtures의 fixture로 응답하는 로컬 NWS API 대역 서버 (지연/오류 주입 가능)
+#
+#   python bench/nws_standin.py --port 8081 --latency-ms 80 --jitter-ms 40 --error-rate 0.01
+#   NWS_API_BASE=http://127.0.0.1:8081 python weather_sse.py
+import argparse
+import asyncio
+import json
+import os
+import random
+from collections import Counter
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+NWS_API_BASE = "https://api.weather.gov"
+
+
+def _fixture(prefix: str) -> bytes:
+    """Return the first fixture whose name starts with ``prefix``."""
+    for name in sorted(os.listdir(FIXTURES)):
+        if name.startswith(prefix):
+            with open(os.path.join(FIXTURES, name), "rb") as f:
+                return f.read()
+    raise FileNotFoundError(f"no fixture starting with {prefix!r} in {FIXTURES}")
+
+
+def create_app(latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+               cache_control: str = "no-store", base_url: str = "http://127.0.0.1:8081") -> Starlette:
+    """Build the stand-in ASGI app.
+
+    Responses are the fixtures (synthetic unless re-recorded) with api.weather.gov links rewritten
+    to ``base_url``. Each /points lookup maps to its own grid cell, so forecast
+    URLs differ per coordinate the way they do upstream.
+    """
+    alerts = _fixture("alerts_active_")
+    points = json.loads(_fixture("points_"))
+    forecast = _fixture("forecast_").replace(NWS_API_BASE.encode(), base_url.encode())
+    hourly = _fixture("forecast_hourly_").replace(NWS_API_BASE.encode(), base_url.encode())
+    counts: Counter[str] = Counter()
+
+    async def respond(kind: str, body: bytes) -> Response:
+        counts[kind] += 1
+        delay = latency_ms + random.uniform(-jitter_ms, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if error_rate and random.random() < error_rate:
+            counts["errors"] += 1
+            return JSONResponse({"title": "Unexpected Problem", "status": 500}, status_code=500)
+        return Response(body, media_type="application/geo+json", headers={"Cache-Control": cache_control})
+
+    async def get_points(request: Request) -> Response:
+        lat, lon = (float(v) for v in request.path_params["coords"].split(","))
+        office = points["properties"]["gridId"]
+        x, y = int((lon + 180) * 40) % 250, int((lat + 90) * 40) % 250
+        grid = f"{base_url}/gridpoints/{office}/{x},{y}"
+        props = {**points["properties"], "gridX": x, "gridY": y, "forecast": f"{grid}/forecast",
+                 "forecastHourly": f"{grid}/forecast/hourly", "forecastGridData": grid}
+        return await respond("points", json.dumps({**points, "properties": props}).encode())
+
+    async def get_forecast(request: Request) -> Response:
+        return await respond("forecast", forecast)
+
+    async def get_hourly(request: Request) -> Response:
+        return await respond("forecast_hourly", hourly)
+
+    async def get_alerts(request: Request) -> Response:
+        return await respond("alerts", alerts)
+
+    async def get_stats(request: Request) -> Response:
+        return JSONResponse(dict(counts))
+
+    return Starlette(routes=[
+        Route("/points/{coords}", get_points),
+        Route("/gridpoints/{office}/{grid}/forecast", get_forecast),
+        Route("/gridpoints/{office}/{grid}/forecast/hourly", get_hourly),
+        Route("/alerts/active", get_alerts),
+        Route("/alerts/active/area/{state}", get_alerts),
+        Route("/_stats", get_stats),
+    ])
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local NWS API stand-in serving recorded fixtures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added latency per response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="+/- random latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of responses that are HTTP 500")
+    parser.add_argument("--cache-control", default="no-store", help="Cache-Control header on responses")
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.cache_control,
+                     base_url=f"http://{args.host}:{args.port}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
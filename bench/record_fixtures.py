@@ -0,0 +1,42 @@
+# 실제 api.weather.gov 응답을 bench/fixtures에 녹화 (벤치마크/로컬 NWS 대역 서버용)
+#
+#   python bench/record_fixtures.py --state CA --point 37.7749,-122.4194
+#
+# 저장소에 포함된 fixture는 합성 데이터이며, 이 스크립트를 실행하면 실제 응답으로 덮어씁니다.
+import argparse
+import os
+import httpx
+
+NWS_API_BASE = "https://api.weather.gov"
+HEADERS = {"User-Agent": "weather-app/1.0", "Accept": "application/geo+json"}
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def record(client: httpx.Client, url: str, name: str) -> dict:
+    response = client.get(url)
+    response.raise_for_status()
+    path = os.path.join(FIXTURES, name)
+    with open(path, "wb") as f:
+        f.write(response.content)
+    print(f"{url} -> {path} ({len(response.content)} bytes)")
+    return response.json()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record NWS responses as benchmark fixtures")
+    parser.add_argument("--state", default="CA")
+    parser.add_argument("--point", default="37.7749,-122.4194")
+    args = parser.parse_args()
+
+    os.makedirs(FIXTURES, exist_ok=True)
+    with httpx.Client(headers=HEADERS, timeout=30.0) as client:
+        record(client, f"{NWS_API_BASE}/alerts/active?area={args.state}", f"alerts_active_{args.state}.json")
+        points = record(client, f"{NWS_API_BASE}/points/{args.point}", f"points_{args.point}.json")
+        props = points["properties"]
+        grid = f"{props['gridId']}_{props['gridX']},{props['gridY']}"
+        record(client, props["forecast"], f"forecast_{grid}.json")
+        record(client, props["forecastHourly"], f"forecast_hourly_{grid}.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# 큰 응답 파싱/포맷팅 같은 CPU 작업을 이벤트 루프 밖의 프로세스 풀에서 실행 (기본 비활성)
+from typing import TYPE_CHECKING, Any, Callable
+import asyncio
+import os
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# 풀 프로세스 수 (0이면 호출한 프로세스에서 바로 실행)
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", "0"))
+# 이 크기(바이트) 이상인 응답만 풀에서 파싱 - 작은 응답은 프로세스 간 전송 비용이 더 큼
+CPU_POOL_MIN_BYTES = int(os.getenv("CPU_POOL_MIN_BYTES", "262144"))
+# 이 개수 이상의 특보만 풀에서 포맷팅
+CPU_POOL_MIN_ITEMS = int(os.getenv("CPU_POOL_MIN_ITEMS", "200"))
+
+_pool: "ProcessPoolExecutor | None" = None
+
+
+def _noop() -> None:
+    pass
+
+
+async def start(workers: int = CPU_POOL_WORKERS) -> None:
+    """Start the pool (if enabled) and wait until its processes are up."""
+    global _pool
+    if workers <= 0 or _pool is not None:
+        return
+    # 풀을 켤 때만 import (기본 비활성이라 서버 시작 시간에 포함하지 않음)
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    # spawn: 이벤트 루프/스레드가 도는 프로세스에서 fork하지 않도록
+    _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(_pool, _noop) for _ in range(workers)))
+
+
+def shutdown() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def run(fn: Callable[..., Any], *args: Any, offload: bool = True) -> Any:
+    """Run ``fn(*args)`` in the pool when it is enabled and ``offload`` is true, else inline.
+
+    ``fn`` and its arguments must be picklable (module-level functions and plain data).
+    """
+    if _pool is None or not offload:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(_pool, fn, *args)
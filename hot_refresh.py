@@ -0,0 +1,127 @@
+# 자주 조회되는 위치/주의 예보와 특보를 만료 전에 미리 갱신하는 백그라운드 갱신기
+#
+# 갱신 대상은 설정된 hot set(좌표, 주 코드)과 최근 조회 수로 학습한 상위 K개 URL입니다. 주기마다
+# 만료가 가까운 항목만 조건부 GET으로 갱신하며, 주기와 갱신 시점에 무작위 지터를 넣어 여러 replica의
+# 갱신이 같은 순간에 몰리지 않도록 합니다.
+from typing import Any, Awaitable, Callable
+from collections import Counter
+import asyncio
+import random
+import sys
+
+
+def parse_locations(value: str) -> list[tuple[float, float]]:
+    """Parse ``"lat,lon;lat,lon"`` into coordinate pairs, skipping malformed entries."""
+    locations = []
+    for part in value.split(";"):
+        latitude, _, longitude = part.strip().partition(",")
+        try:
+            locations.append((float(latitude), float(longitude)))
+        except ValueError:
+            continue
+    return locations
+
+
+def parse_states(value: str) -> list[str]:
+    """Parse ``"CA,TX"`` into upper-case state codes."""
+    return [state.strip().upper() for state in value.split(",") if state.strip()]
+
+
+class HotRefresher:
+    """Keep cached responses for hot URLs fresh by refreshing them shortly before they expire.
+
+    ``configured()`` returns the URLs of the configured hot set; the ``top_k`` URLs
+    passed to ``record`` most often (with counts halved every pass) are refreshed too.
+    ``expires_in(url)`` returns the seconds until the cached copy goes stale (None if
+    not cached) and ``refresh(url)`` fetches it upstream.
+    """
+
+    def __init__(self, refresh: Callable[[str], Awaitable[Any]],
+                 expires_in: Callable[[str], float | None],
+                 configured: Callable[[], Awaitable[list[str]]],
+                 top_k: int = 0, interval: float = 30.0, lead: float = 60.0,
+                 jitter: float = 0.2, concurrency: int = 4):
+        self.refresh = refresh
+        self.expires_in = expires_in
+        self.configured = configured
+        self.top_k = top_k
+        self.interval = interval
+        self.lead = lead
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self._counts: Counter[str] = Counter()
+        self._task: asyncio.Task | None = None
+        self.hot_urls: list[str] = []
+        self.passes = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    def record(self, url: str) -> None:
+        """Count one lookup of ``url`` toward the learned top-K set."""
+        if self.top_k > 0:
+            self._counts[url] += 1
+
+    def _jittered(self, value: float) -> float:
+        return value * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _due(self, url: str) -> bool:
+        remaining = self.expires_in(url)
+        # 다음 주기 전에 만료될 항목을 지터를 준 lead 시간만큼 미리 갱신
+        return remaining is None or remaining <= self._jittered(self.lead) + self.interval
+
+    async def _refresh(self, url: str, limit: asyncio.Semaphore) -> None:
+        async with limit:
+            try:
+                data = await self.refresh(url)
+            except Exception as e:
+                data = None
+                print(f"[WARN] Hot refresh of {url} failed: {e}", file=sys.stderr)
+        if data is None:
+            self.failures += 1
+        else:
+            self.refreshes += 1
+
+    async def run_once(self) -> int:
+        """Refresh the hot URLs that are due; return how many were refreshed."""
+        self.passes += 1
+        urls = dict.fromkeys(await self.configured())
+        if self.top_k > 0:
+            urls.update(dict.fromkeys(url for url, _ in self._counts.most_common(self.top_k)))
+            # 최근 조회가 더 큰 비중을 갖도록 매 주기 조회 수를 절반으로 줄임
+            self._counts = Counter({url: count // 2 for url, count in self._counts.items() if count > 1})
+        self.hot_urls = list(urls)
+        due = [url for url in self.hot_urls if self._due(url)]
+        limit = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._refresh(url, limit) for url in due))
+        return len(due)
+
+    async def _run(self) -> None:
+        # 여러 replica가 같은 시각에 시작해도 첫 갱신이 겹치지 않도록 무작위로 지연
+        await asyncio.sleep(random.uniform(0, self.interval * self.jitter))
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"[ERROR] Hot refresh pass failed: {e}", file=sys.stderr)
+            await asyncio.sleep(self._jittered(self.interval))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hot_urls": len(self.hot_urls),
+            "passes": self.passes,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
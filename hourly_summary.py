@@ -0,0 +1,137 @@
+# 시간별 예보(forecastHourly)를 배열 기반으로 적재하고 일별 요약 계산
+from array import array
+from collections import Counter
+from datetime import date, datetime
+import re
+
+_NUMBER = re.compile(r"\d+")
+
+# 요약에 나열할 강수 구간 최대 개수
+MAX_WINDOWS = 8
+# 요약할 수 있는 최대 일수 (NWS 시간별 예보는 약 7일 분량)
+MAX_DAYS = 7
+# 기온 값이 없는 시간을 나타내는 값 (array "h"의 최솟값, 일별 최저/최고/평균 계산에서 제외)
+MISSING_TEMPERATURE = -32768
+
+
+def _wind_mph(value: str | None) -> int:
+    """Return the highest speed in an NWS wind string such as "10 to 15 mph"."""
+    numbers = _NUMBER.findall(value or "")
+    return max(map(int, numbers)) if numbers else 0
+
+
+class HourlySeries:
+    """Hourly forecast stored column-wise in compact typed arrays.
+
+    One hour costs a few bytes per field instead of a ~20-key dict, and
+    per-day aggregates run over contiguous array slices.
+    """
+
+    def __init__(self, periods: list[dict]):
+        self.start: datetime | None = None
+        self.dates: list[date] = []            # 일자별 날짜
+        self.day_bounds = array("I")           # 일자별 시작 인덱스 (+ 끝)
+        self.hours = array("b")                # 현지 시각(0-23)
+        self.temperature = array("h")          # °F, 값이 없으면 MISSING_TEMPERATURE
+        self.wind = array("h")                 # mph
+        self.pop = array("b")                  # 강수 확률 %, 값이 없으면 0
+        self.condition = array("H")            # conditions 목록의 인덱스
+        self.conditions: list[str] = []
+        lookup: dict[str, int] = {}
+        for i, period in enumerate(periods):
+            start = datetime.fromisoformat(period["startTime"])
+            if self.start is None:
+                self.start = start
+            if not self.dates or self.dates[-1] != start.date():
+                self.dates.append(start.date())
+                self.day_bounds.append(i)
+            self.hours.append(start.hour)
+            temperature = period.get("temperature")
+            if temperature is None:
+                temperature = MISSING_TEMPERATURE
+            elif period.get("temperatureUnit") == "C":
+                temperature = round(temperature * 9 / 5 + 32)
+            self.temperature.append(temperature)
+            self.wind.append(_wind_mph(period.get("windSpeed")))
+            self.pop.append((period.get("probabilityOfPrecipitation") or {}).get("value") or 0)
+            text = period.get("shortForecast") or "Unknown"
+            if text not in lookup:
+                lookup[text] = len(self.conditions)
+                self.conditions.append(text)
+            self.condition.append(lookup[text])
+        self.day_bounds.append(len(self.temperature))
+
+    def __len__(self) -> int:
+        return len(self.temperature)
+
+    def daily(self, days: int | None = None) -> list[dict]:
+        """Return per-day min/max/mean temperature, max wind, max PoP and main condition.
+
+        Hours without a temperature are left out; a day with none has None temperatures.
+        """
+        result = []
+        for d, day in enumerate(self.dates[:days]):
+            lo, hi = self.day_bounds[d], self.day_bounds[d + 1]
+            temps = [t for t in self.temperature[lo:hi] if t != MISSING_TEMPERATURE]
+            main = Counter(self.condition[lo:hi]).most_common(1)[0][0]
+            result.append({
+                "date": day,
+                "min_temp": min(temps) if temps else None,
+                "max_temp": max(temps) if temps else None,
+                "mean_temp": sum(temps) / len(temps) if temps else None,
+                "max_wind": max(self.wind[lo:hi]),
+                "max_pop": max(self.pop[lo:hi]),
+                "condition": self.conditions[main],
+            })
+        return result
+
+    def precipitation_windows(self, threshold: int = 50, days: int | None = None) -> list[tuple[int, int, int]]:
+        """Return (start, end, max PoP) index ranges where PoP stays at or above ``threshold``."""
+        limit = self.day_bounds[min(days, len(self.dates))] if days is not None else len(self)
+        windows = []
+        start = None
+        for i in range(limit + 1):
+            wet = i < limit and self.pop[i] >= threshold
+            if wet and start is None:
+                start = i
+            elif not wet and start is not None:
+                windows.append((start, i, max(self.pop[start:i])))
+                start = None
+        return windows
+
+    def label(self, index: int) -> str:
+        """Return a short "Wed 14:00" label for an hour index."""
+        d = next(d for d in range(len(self.dates)) if self.day_bounds[d + 1] > index)
+        return f"{self.dates[d]:%a} {self.hours[index]:02d}:00"
+
+
+def summarize_hourly(periods: list[dict], days: int = 7, precip_threshold: int = 50) -> str:
+    """Summarize the first ``days`` days (clamped to 1..7) of hourly forecast periods, a few lines per day."""
+    # 0이나 음수(슬라이스가 뒤에서부터 잘림), 7일 초과 요청은 1~7일로 제한
+    days = max(1, min(MAX_DAYS, days))
+    series = HourlySeries(periods)
+    if not len(series):
+        return ""
+    hours = series.day_bounds[min(days, len(series.dates))]
+    lines = [f"Hourly summary ({hours} hours from {series.start:%Y-%m-%d %H:%M %z}):"]
+    for day in series.daily(days):
+        if day["min_temp"] is None:
+            temperature = "temperature n/a"
+        else:
+            temperature = f"{day['min_temp']}-{day['max_temp']}°F (avg {day['mean_temp']:.0f})"
+        lines.append(
+            f"{day['date']:%a %m/%d}: {temperature}, wind up to {day['max_wind']} mph, "
+            f"precip chance up to {day['max_pop']}%, mostly {day['condition']}"
+        )
+    windows = series.precipitation_windows(precip_threshold, days)
+    if windows:
+        spans = []
+        for start, end, peak in windows[:MAX_WINDOWS]:
+            span = series.label(start) if end - start == 1 else f"{series.label(start)} to {series.label(end - 1)}"
+            spans.append(f"{span} (max {peak}%)")
+        if len(windows) > MAX_WINDOWS:
+            spans.append(f"{len(windows) - MAX_WINDOWS} more")
+        lines.append(f"Precipitation chance >= {precip_threshold}%: " + "; ".join(spans))
+    else:
+        lines.append(f"No periods with precipitation chance >= {precip_threshold}%.")
+    return "\n".join(lines)
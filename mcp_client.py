@@ -1,25 +1,56 @@
-from autogen_ext.tools.mcp import McpWorkbench, StdioServerParams
+from autogen_ext.tools.mcp import StdioServerParams
 from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.ui import Console
 
 import asyncio
 import os
+import sys
 from dotenv import load_dotenv
+from tool_cache import CachingWorkbench, ToolResultCache
+from weather_launcher import launcher_params
+from workbench_pool import McpWorkbenchPool
 
 load_dotenv()
 
+DEFAULT_PROMPT = "캘리포니아의 현재 기상 알림과 37.7749, -122.4194 위치의 일기예보를 알려줘."
+
+async def run_agent(pool: McpWorkbenchPool, cache: ToolResultCache, model_client, prompt: str, stream: bool) -> None:
+    # 미리 띄워 둔 weather.py 프로세스를 빌려 사용 (실행마다 서버를 새로 시작하지 않음)
+    async with pool.lease() as workbench:
+        # AssistantAgent에 MCP Workbench와 모델 클라이언트 연결 (같은 인자의 반복 호출은 캐시에서 응답)
+        agent = AssistantAgent(
+            name="weather_assistant",
+            model_client=model_client,
+            workbench=CachingWorkbench(workbench, cache),
+            reflect_on_tool_use=True,
+            model_client_stream=stream,
+        )
+
+        # 프롬프트 입력 시 MCP tool을 자동 호출
+        if stream:
+            await Console(agent.run_stream(task=prompt))
+        else:
+            result = await agent.run(task=prompt)
+            print(f"\n[{prompt}]\n{result.messages[-1].to_text()}")
+
 async def main() -> None:
     params = StdioServerParams(
         command="python3",
         args=["weather.py"],
         read_timeout_seconds=60,
     )
+    # WEATHER_LAUNCHER=1이면 미리 import를 끝낸 런처(weather_launcher.py serve)에서 서버를 fork (없으면 직접 실행)
+    if os.getenv("WEATHER_LAUNCHER") == "1":
+        params = launcher_params(read_timeout_seconds=60)
+    # 인자로 여러 프롬프트를 주면 풀의 서버 프로세스를 나눠 쓰며 동시에 실행
+    prompts = sys.argv[1:] or [DEFAULT_PROMPT]
 
-    async with McpWorkbench(server_params=params) as workbench:
-        tools = await workbench.list_tools()
-        print("[사용 가능한 MCP 도구 목록]")
-        print(tools)
+    async with McpWorkbenchPool(params) as pool:
+        async with pool.lease() as workbench:
+            tools = await workbench.list_tools()
+            print("[사용 가능한 MCP 도구 목록]")
+            print(tools)
 
         # 모델 클라이언트 준비 (Azure OpenAI)
         model_client = AzureOpenAIChatCompletionClient(
@@ -30,18 +61,12 @@ async def main() -> None:
             api_key=os.getenv("AZURE_OPENAI_API_KEY"),
         )
 
-        # AssistantAgent에 MCP Workbench와 모델 클라이언트 연결
-        agent = AssistantAgent(
-            name="weather_assistant",
-            model_client=model_client,
-            workbench=workbench,
-            reflect_on_tool_use=True,
-            model_client_stream=True,
-        )
-
-        # 프롬프트 입력 시 MCP tool을 자동 호출
-        prompt = "캘리포니아의 현재 기상 알림과 37.7749, -122.4194 위치의 일기예보를 알려줘."
-        await Console(agent.run_stream(task=prompt))
+        # 프롬프트가 하나면 스트리밍 출력, 여러 개면 각 실행의 최종 답변만 출력
+        stream = len(prompts) == 1
+        # 도구 결과 캐시는 모든 실행이 공유
+        cache = ToolResultCache()
+        await asyncio.gather(*(run_agent(pool, cache, model_client, prompt, stream) for prompt in prompts))
+        print(f"[도구 결과 캐시] {cache.stats()}")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,10 +1,12 @@
-from autogen_ext.tools.mcp import SseMcpToolAdapter, SseServerParams
+from autogen_ext.tools.mcp import SseServerParams
 from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.ui import Console
 import asyncio
 import os
 from dotenv import load_dotenv
+from mcp_sse_session import SharedSseSession
+from tool_cache import CachingTool, ToolResultCache
 
 # Load environment variables
 load_dotenv()
@@ -13,13 +15,11 @@ async def main() -> None:
     # Setup server params for remote service
     server_params = SseServerParams(url="http://localhost:8000/sse", headers={"Authorization": "Bearer xxxxxx"})
 
-    print("[LOG] Creating adapter1 (get_alerts) ...")
-    adapter1 = await SseMcpToolAdapter.from_server_params(server_params, "get_alerts")
-    print("[LOG] adapter1 created: {}".format(adapter1))
-
-    print("[LOG] Creating adapter2 (get_forecast) ...")
-    adapter2 = await SseMcpToolAdapter.from_server_params(server_params, "get_forecast")
-    print("[LOG] adapter2 created: {}".format(adapter2))
+    # One SSE session for every tool; schemas come from MCP_SCHEMA_CACHE_FILE when it is fresh
+    shared = SharedSseSession(server_params)
+    print("[LOG] Creating adapters (get_alerts, get_forecast) ...")
+    adapter1, adapter2 = await shared.adapters(["get_alerts", "get_forecast"])
+    print("[LOG] adapters created: {}, {}".format(adapter1, adapter2))
 
     # Prepare the model client (Azure OpenAI)
     model_client = AzureOpenAIChatCompletionClient(
@@ -30,11 +30,14 @@ async def main() -> None:
         api_key=os.getenv("AZURE_OPENAI_API_KEY"),
     )
 
+    # Repeated tool calls with the same arguments are answered from the cache (TOOL_CACHE_* env vars)
+    cache = ToolResultCache()
+
     # Initialize the AssistantAgent with streaming
     agent = AssistantAgent(
         name="weather_sse_assistant",
         model_client=model_client,
-        tools=[adapter1, adapter2],
+        tools=[CachingTool(adapter1, cache), CachingTool(adapter2, cache)],
         reflect_on_tool_use=True,
         model_client_stream=True,
     )
@@ -43,9 +46,13 @@ async def main() -> None:
     prompt = "캘리포니아의 현재 기상 알림과 37.7749, -122.4194 위치의 일기예보를 SSE로 스트리밍해줘."
 
     # Stream and label responses: tool (MCP 서버) vs model (LLM)
-    await Console(
-        agent.run_stream(task=prompt)
-    )
+    try:
+        await Console(
+            agent.run_stream(task=prompt)
+        )
+    finally:
+        print("[LOG] tool cache: {}".format(cache.stats()))
+        await shared.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,174 @@
+# 하나의 MCP SSE 세션을 모든 SseMcpToolAdapter가 공유하도록 하는 클라이언트 도우미
+#
+# SseMcpToolAdapter.from_server_params는 도구마다 SSE 연결과 핸드셰이크를 새로 열고, 세션 없이 만든
+# 어댑터는 도구를 호출할 때마다 또 새 세션을 엽니다. SharedSseSession은 세션 하나를 열어 list_tools
+# 한 번으로 모든 도구를 찾고(선택적으로 스키마를 파일에 캐시), 그 세션 위에서 어댑터를 만들며,
+# 연결이 끊기면 다시 연결해 호출을 한 번 재시도합니다. (날씨 도구는 모두 조회 전용이라 재시도해도 안전)
+from typing import Any, Awaitable, Callable, TypeVar
+import asyncio
+import json
+import os
+import time
+import anyio
+import httpx
+from autogen_core import CancellationToken
+from autogen_ext.tools.mcp import SseMcpToolAdapter, SseServerParams, create_mcp_server_session
+from mcp import ClientSession, McpError, Tool
+from mcp.types import CONNECTION_CLOSED
+from pydantic import BaseModel
+
+# 도구 스키마 캐시 파일 (비어 있으면 캐시하지 않음) - 있으면 시작 시 list_tools 없이 바로 어댑터 생성
+MCP_SCHEMA_CACHE_FILE = os.getenv("MCP_SCHEMA_CACHE_FILE", "")
+# 캐시 유효 시간(초) - 지나면 다시 list_tools로 갱신
+MCP_SCHEMA_CACHE_TTL = float(os.getenv("MCP_SCHEMA_CACHE_TTL", "86400"))
+
+# 연결 문제로 보고 다시 연결할 예외 (JSON-RPC 오류 응답과 도구 실행 오류는 포함하지 않음)
+RECONNECT_ERRORS = (
+    ConnectionError, httpx.HTTPError,
+    anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream,
+)
+
+T = TypeVar("T")
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Return True if ``error`` means the session's connection is gone (not an error reply)."""
+    # McpError은 대부분 서버의 정상적인 JSON-RPC 오류 응답이며, 연결이 닫힌 경우만 재연결 대상
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, RECONNECT_ERRORS)
+
+
+class SharedSessionToolAdapter(SseMcpToolAdapter):
+    """SseMcpToolAdapter that runs on a SharedSseSession, reconnecting it when needed."""
+
+    def __init__(self, shared: "SharedSseSession", tool: Tool):
+        super().__init__(server_params=shared.server_params, tool=tool)
+        self._shared = shared
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        kwargs = args.model_dump(exclude_unset=True)
+        return await self._shared.call(
+            lambda session: self._run(args=kwargs, cancellation_token=cancellation_token, session=session))
+
+
+class SharedSseSession:
+    """One MCP SSE session shared by every tool adapter, with schema cache and reconnect.
+
+    The session lives in its own task, so adapters may use it from any task.
+    """
+
+    def __init__(self, server_params: SseServerParams, schema_cache: str | None = MCP_SCHEMA_CACHE_FILE,
+                 schema_cache_ttl: float = MCP_SCHEMA_CACHE_TTL):
+        self.server_params = server_params
+        self.schema_cache = schema_cache
+        self.schema_cache_ttl = schema_cache_ttl
+        self._session: ClientSession | None = None
+        self._stop: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self.connects = 0
+
+    async def __aenter__(self) -> "SharedSseSession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _run_session(self, ready: asyncio.Future, stop: asyncio.Event) -> None:
+        # SSE 클라이언트 컨텍스트는 같은 태스크에서 열고 닫아야 하므로 전용 태스크에서 유지
+        try:
+            async with create_mcp_server_session(self.server_params) as session:
+                await session.initialize()
+                ready.set_result(session)
+                await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+
+    async def _connect(self) -> None:
+        ready = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run_session(ready, self._stop))
+        self._session = await ready
+        self.connects += 1
+
+    async def _disconnect(self) -> None:
+        task, self._task, self._session = self._task, None, None
+        if task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(task, self.server_params.timeout)
+        except (asyncio.TimeoutError, Exception):
+            task.cancel()
+
+    async def session(self, failed: ClientSession | None = None) -> ClientSession:
+        """Return the open session, (re)connecting if it is closed or is ``failed``."""
+        async with self._lock:
+            if self._session is None or self._session is failed or self._task.done():
+                await self._disconnect()
+                await self._connect()
+            return self._session
+
+    async def call(self, fn: Callable[[ClientSession], Awaitable[T]]) -> T:
+        """Run ``fn(session)``, reconnecting and retrying once if the connection failed."""
+        session = await self.session()
+        try:
+            return await fn(session)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            return await fn(await self.session(failed=session))
+
+    def _load_cached_tools(self) -> list[Tool] | None:
+        if not self.schema_cache:
+            return None
+        try:
+            if time.time() - os.path.getmtime(self.schema_cache) > self.schema_cache_ttl:
+                return None
+            with open(self.schema_cache) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("url") != self.server_params.url:
+            return None
+        return [Tool.model_validate(tool) for tool in data.get("tools", [])]
+
+    def _save_cached_tools(self, tools: list[Tool]) -> None:
+        if not self.schema_cache:
+            return
+        data = {"url": self.server_params.url, "tools": [tool.model_dump(mode="json") for tool in tools]}
+        tmp = f"{self.schema_cache}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.schema_cache)
+
+    async def list_tools(self, refresh: bool = False) -> list[Tool]:
+        """Return the server's tools from the schema cache, or from one list_tools call."""
+        tools = None if refresh else self._load_cached_tools()
+        if tools is None:
+            result = await self.call(lambda session: session.list_tools())
+            tools = result.tools
+            self._save_cached_tools(tools)
+        return tools
+
+    async def adapters(self, names: list[str] | None = None, refresh: bool = False) -> list[SharedSessionToolAdapter]:
+        """Build an adapter per tool (or per name in ``names``) on this session.
+
+        With a fresh schema cache no connection is made until the first tool call.
+        """
+        tools = await self.list_tools(refresh)
+        by_name = {tool.name: tool for tool in tools}
+        if names is None:
+            names = list(by_name)
+        missing = [name for name in names if name not in by_name]
+        if missing:
+            if not refresh:
+                return await self.adapters(names, refresh=True)
+            raise ValueError(f"Tools not found: {', '.join(missing)}, available tools: {', '.join(by_name)}")
+        return [SharedSessionToolAdapter(self, by_name[name]) for name in names]
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._disconnect()
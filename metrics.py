@@ -0,0 +1,236 @@
+# Prometheus 텍스트 형식 메트릭 (외부 의존성 없는 최소 구현)
+from typing import Any, Awaitable, Callable, Iterator
+from contextlib import contextmanager
+import asyncio
+import functools
+import os
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 이벤트 루프 지연 측정 주기와 /health가 비정상으로 판단하는 지연 (초)
+LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5"))
+HEALTH_MAX_LOOP_LAG = float(os.getenv("HEALTH_MAX_LOOP_LAG", "2.0"))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, optionally split by label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # 라벨 값 -> [버킷별 개수..., +Inf 개수], 합계
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        self._sums[labels] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe the wall time of the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self) -> Iterator[str]:
+        for labels, counts in self._counts.items():
+            total = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                total += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                yield f"{self.name}_bucket{_labels((*self.labelnames, 'le'), (*labels, le))} {total}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(self._sums[labels])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {total}"
+
+
+class Callback:
+    """Gauge or counter whose values are read from ``fn`` at scrape time.
+
+    ``fn`` returns a number, or a dict of label-value tuples to numbers.
+    """
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Any],
+                 labelnames: tuple[str, ...] = (), kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = labelnames
+        self.kind = kind
+
+    def samples(self) -> Iterator[str]:
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in values.items():
+            if value is not None:
+                yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Registry:
+    """Collects metrics and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram | Callback] = {}
+        # 모든 샘플에 붙는 고정 라벨 (예: 다중 워커 모드의 worker)
+        self.const_labels: dict[str, str] = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, help: str, fn: Callable[[], Any],
+                 labelnames: tuple[str, ...] = (), kind: str = "gauge") -> Callback:
+        return self._add(Callback(name, help, fn, labelnames, kind))
+
+    def render(self) -> str:
+        const = ",".join(f'{name}="{_escape(value)}"' for name, value in self.const_labels.items())
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample in metric.samples():
+                if const:
+                    name, sep, rest = sample.partition("{")
+                    sample = f"{name}{{{const},{rest}" if sep else sample.replace(" ", f"{{{const}}} ", 1)
+                lines.append(sample)
+        return "\n".join(lines) + "\n"
+
+
+def merge(texts: list[str]) -> str:
+    """Merge expositions from several processes, keeping one HELP/TYPE header per metric."""
+    families: dict[str, list[str]] = {}
+    for text in texts:
+        family: list[str] = []
+        for line in text.splitlines():
+            if line.startswith("# "):
+                name = line.split(" ", 3)[2]
+                family = families.setdefault(name, [])
+                if line not in family[:2]:
+                    family.append(line)
+            elif line:
+                family.append(line)
+    return "\n".join(line for family in families.values() for line in family) + "\n"
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up a periodic sleep."""
+
+    def __init__(self, histogram: Histogram, interval: float = LOOP_LAG_INTERVAL):
+        self.histogram = histogram
+        self.interval = interval
+        self.lag = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.histogram.observe(self.lag)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+registry = Registry()
+
+tool_latency = registry.histogram(
+    "mcp_tool_duration_seconds", "MCP tool call duration.", ("tool",))
+tool_errors = registry.counter(
+    "mcp_tool_errors_total", "MCP tool calls that raised an exception.", ("tool",))
+loop_lag = LoopLagMonitor(registry.histogram(
+    "event_loop_lag_seconds", "Delay of the event loop waking a periodic timer.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)))
+registry.callback("event_loop_lag_last_seconds", "Most recent event loop lag sample.", lambda: loop_lag.lag)
+
+
+def timed_tool(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Record the duration (and exceptions) of an async MCP tool function.
+
+    Apply below ``@mcp.tool()``; ``functools.wraps`` keeps the signature and
+    annotations FastMCP reads to build the tool schema.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        except Exception:
+            tool_errors.inc(fn.__name__)
+            raise
+        finally:
+            tool_latency.observe(time.perf_counter() - start, fn.__name__)
+    return wrapper
+
+
+def health() -> tuple[bool, dict[str, Any]]:
+    """Return (healthy, details) from the in-process instrumentation."""
+    healthy = loop_lag.lag <= HEALTH_MAX_LOOP_LAG
+    return healthy, {"status": "ok" if healthy else "degraded", "event_loop_lag_seconds": round(loop_lag.lag, 4)}
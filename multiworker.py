@@ -0,0 +1,82 @@
+# 여러 워커 프로세스로 하나의 포트를 서비스하는 다중 워커 모드
+#
+# 부모 프로세스가 공용 포트와 워커별 내부 포트(127.0.0.1, 임의 포트)를 미리 열고 워커를 fork합니다.
+# 공용 포트로 들어온 연결은 커널이 워커들에 분배하고, 각 워커는 자신의 내부 포트도 함께 서비스하므로
+# 다른 워커가 가진 SSE 세션의 /messages/ 요청은 그 워커의 내부 포트로 전달할 수 있습니다.
+from typing import Callable
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import socket
+import uvicorn
+from starlette.applications import Starlette
+
+
+def _listen(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(create_app: Callable[[int, dict[str, str]], Starlette], worker_id: int,
+                worker_urls: dict[str, str], sockets: list[socket.socket], log_level: str) -> None:
+    # 부모의 시그널 처리기를 물려받지 않고 uvicorn이 SIGTERM/SIGINT를 직접 처리
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    app = create_app(worker_id, worker_urls)
+    uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=sockets)
+
+
+def serve(create_app: Callable[[int, dict[str, str]], Starlette], host: str, port: int,
+          workers: int, log_level: str = "info") -> None:
+    """Run ``workers`` processes on ``host:port``, restarting any that exit unexpectedly.
+
+    ``create_app(worker_id, worker_urls)`` builds each worker's app; ``worker_urls``
+    maps every worker ID (as a string) to its internal base URL.
+    """
+    public = _listen(host, port)
+    internal = [_listen("127.0.0.1", 0) for _ in range(workers)]
+    worker_urls = {str(i): f"http://127.0.0.1:{sock.getsockname()[1]}" for i, sock in enumerate(internal)}
+    ctx = multiprocessing.get_context("fork")
+    processes: dict[int, multiprocessing.Process] = {}
+    stopping = False
+
+    def start(worker_id: int) -> None:
+        process = ctx.Process(
+            target=_run_worker,
+            args=(create_app, worker_id, worker_urls, [public, internal[worker_id]], log_level),
+            name=f"weather-mcp-worker-{worker_id}",
+        )
+        process.start()
+        processes[worker_id] = process
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"[INFO] Supervisor {os.getpid()} starting {workers} workers: {worker_urls}")
+    for worker_id in range(workers):
+        start(worker_id)
+
+    while processes:
+        multiprocessing.connection.wait([p.sentinel for p in processes.values()])
+        for worker_id, process in list(processes.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del processes[worker_id]
+            if not stopping:
+                print(f"[WARN] Worker {worker_id} exited with {process.exitcode}, restarting")
+                start(worker_id)
+    public.close()
+    for sock in internal:
+        sock.close()
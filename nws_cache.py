@@ -0,0 +1,281 @@
+# NWS 응답 캐시 모음
+from typing import Any, Mapping
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+import json
+import os
+import time
+
+
+class GridpointCache:
+    """LRU + TTL cache mapping coordinates to their NWS grid point properties.
+
+    Coordinates are quantized to ``resolution`` degrees so nearby points that
+    fall in the same forecast grid cell share one entry.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 86400.0,
+                 resolution: float = 0.02, path: str | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.resolution = resolution
+        self.path = path
+        # key -> (expires_at, value); 만료 시각은 재시작 후에도 유효하도록 wall clock 사용
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, latitude: float, longitude: float) -> str:
+        """Quantize a coordinate to the cache grid."""
+        lat = round(latitude / self.resolution) * self.resolution
+        lon = round(longitude / self.resolution) * self.resolution
+        return f"{lat:.4f},{lon:.4f}"
+
+    def get(self, latitude: float, longitude: float) -> dict[str, Any] | None:
+        """Return the cached grid point for a coordinate, or None."""
+        key = self.key(latitude, longitude)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, latitude: float, longitude: float, value: dict[str, Any]) -> None:
+        """Store a grid point, evicting the least recently used entries."""
+        key = self.key(latitude, longitude)
+        self._entries[key] = (time.time() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def restore(self, key: str, expires_at: float, value: dict[str, Any]) -> bool:
+        """Add a saved entry unless the key is already cached or the cache is full."""
+        if key in self._entries or len(self._entries) >= self.maxsize or expires_at <= time.time():
+            return False
+        self._entries[key] = (expires_at, value)
+        # 불러온 항목은 새로 조회한 항목보다 먼저 축출되도록 LRU 앞쪽에 둠
+        self._entries.move_to_end(key, last=False)
+        return True
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def load(self) -> int:
+        """Load unexpired entries from ``path``; return how many were loaded."""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if saved.get("resolution") != self.resolution:
+            return 0
+        now = time.time()
+        loaded = 0
+        for key, (expires_at, value) in saved.get("entries", {}).items():
+            if expires_at > now:
+                self._entries[key] = (expires_at, value)
+                loaded += 1
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return loaded
+
+    def save(self) -> None:
+        """Write the current entries to ``path`` atomically."""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"resolution": self.resolution, "entries": dict(self._entries)}, f)
+        os.replace(tmp_path, self.path)
+
+
+@dataclass
+class CachedResponse:
+    """A parsed NWS response together with its HTTP caching metadata."""
+    data: Any
+    fresh_until: float
+    etag: str | None = None
+    last_modified: str | None = None
+    # no-cache/must-revalidate 응답은 만료 후 재검증 없이 반환하지 않음 (stale-while-revalidate 제외)
+    must_revalidate: bool = False
+    # 메모리 상한 계산용 대략적인 크기(바이트, 원본 응답 본문 길이)
+    size: int = 0
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.fresh_until
+
+    def expires_in(self) -> float:
+        """Return seconds until the entry goes stale (negative once it is stale)."""
+        return self.fresh_until - time.monotonic()
+
+    def fresh_until_wall(self) -> float:
+        """Return ``fresh_until`` as a wall-clock timestamp (for storing across restarts)."""
+        return time.time() + (self.fresh_until - time.monotonic())
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Return If-None-Match / If-Modified-Since headers for revalidation."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _parse_cache_control(value: str) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+def must_revalidate(headers: Mapping[str, str]) -> bool:
+    """Return True when the response must not be served stale without revalidating it first."""
+    directives = _parse_cache_control(headers.get("cache-control", ""))
+    return any(name in directives for name in ("no-cache", "must-revalidate", "proxy-revalidate"))
+
+
+def freshness_lifetime(headers: Mapping[str, str]) -> float | None:
+    """Return how many seconds a response stays fresh, or None if it must not be stored.
+
+    Follows RFC 9111 for a shared cache: ``s-maxage`` then ``max-age`` (minus
+    ``Age``), falling back to ``Expires - Date``.
+    """
+    directives = _parse_cache_control(headers.get("cache-control", ""))
+    if "no-store" in directives or "private" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    age = 0.0
+    try:
+        age = float(headers.get("age", 0))
+    except ValueError:
+        pass
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name):
+            try:
+                return max(0.0, float(directives[name]) - age)
+            except ValueError:
+                break
+    expires = headers.get("expires")
+    if expires:
+        try:
+            date = headers.get("date")
+            now = parsedate_to_datetime(date).timestamp() if date else time.time()
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - now)
+        except (TypeError, ValueError):
+            return 0.0
+    return 0.0
+
+
+class ResponseCache:
+    """LRU cache of parsed NWS responses honoring Cache-Control, Expires and validators.
+
+    Fresh entries are served from memory; stale entries that carry an ETag or
+    Last-Modified are kept so the caller can revalidate them with a conditional GET.
+    The cache holds at most ``maxsize`` entries and, when ``max_bytes`` is set,
+    at most that many bytes of (approximate) payload; a response larger than
+    ``max_bytes`` on its own is not cached.
+    """
+
+    def __init__(self, maxsize: int = 1024, max_bytes: int = 0):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.hits = 0
+        # 만료 직후라 즉시 반환하고 백그라운드에서 갱신한 조회 수 (stale-while-revalidate)
+        self.stale = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, url: str) -> CachedResponse | None:
+        """Return the entry for a URL, fresh or stale, without counting it."""
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def _remove(self, url: str) -> None:
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def store(self, url: str, data: Any, headers: Mapping[str, str], size: int = 0) -> None:
+        """Cache a 200 response if its headers allow it; ``size`` is its body length in bytes."""
+        lifetime = freshness_lifetime(headers)
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        self._remove(url)
+        if lifetime is None or (lifetime <= 0 and not etag and not last_modified):
+            return
+        if self.max_bytes and size > self.max_bytes:
+            return
+        self._entries[url] = CachedResponse(data, time.monotonic() + lifetime, etag, last_modified,
+                                            must_revalidate(headers), size)
+        self.bytes += size
+        # 항목 수와 크기 합계가 모두 상한 안에 들 때까지 가장 오래 쓰지 않은 항목부터 축출
+        while len(self._entries) > self.maxsize or (self.max_bytes and self.bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    def restore(self, url: str, fresh_until: float, data: Any, etag: str | None = None,
+                last_modified: str | None = None, size: int = 0) -> bool:
+        """Add a saved response (``fresh_until`` is a wall-clock time) unless the URL is already cached or it does not fit."""
+        if (url in self._entries or len(self._entries) >= self.maxsize
+                or (self.max_bytes and self.bytes + size > self.max_bytes)):
+            return False
+        # 저장소에는 Cache-Control 지시어가 없으므로 첫 재검증 전까지는 만료된 값을 그대로 반환하지 않음
+        self._entries[url] = CachedResponse(data, time.monotonic() + (fresh_until - time.time()), etag, last_modified,
+                                            must_revalidate=True, size=size)
+        self.bytes += size
+        self._entries.move_to_end(url, last=False)
+        return True
+
+    def refresh(self, url: str, headers: Mapping[str, str]) -> Any:
+        """Apply a 304 Not Modified to the stale entry and return its data."""
+        entry = self._entries[url]
+        lifetime = freshness_lifetime(headers)
+        entry.fresh_until = time.monotonic() + (lifetime or 0.0)
+        entry.etag = headers.get("etag", entry.etag)
+        entry.last_modified = headers.get("last-modified", entry.last_modified)
+        entry.must_revalidate = must_revalidate(headers)
+        self.revalidations += 1
+        return entry.data
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/stale/revalidate/miss counters and the current size."""
+        return {
+            "size": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "stale": self.stale,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
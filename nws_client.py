@@ -0,0 +1,467 @@
+# 날씨 MCP 서버들이 공유하는 NWS 업스트림 클라이언트
+from typing import Any
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+import asyncio
+import os
+import sys
+import time
+import httpx
+import cpu_pool
+import metrics
+import nws_json
+from nws_cache import CachedResponse, GridpointCache, ResponseCache
+from nws_store import NwsStore
+from singleflight import SingleFlight
+from hot_refresh import HotRefresher, parse_locations, parse_states
+from resilience import Resilience, parse_timeouts
+from alerts_index import AlertsIndex, AlertsIngester
+
+# 벤치마크 등에서 로컬 NWS 대역 서버(bench/nws_standin.py)를 가리키도록 재정의 가능
+NWS_API_BASE = os.getenv("NWS_API_BASE", "https://api.weather.gov")
+USER_AGENT = "weather-app/1.0"
+REQUEST_TIMEOUT = 30.0
+
+# 엔드포인트 종류별 시도당 timeout(초), NWS_TIMEOUTS="forecast=5,alerts=10" 형식으로 재정의
+DEFAULT_TIMEOUTS = {"points": 10.0, "forecast": 10.0, "forecast_hourly": 15.0, "alerts": 15.0}
+NWS_TIMEOUTS = {**DEFAULT_TIMEOUTS, **parse_timeouts(os.getenv("NWS_TIMEOUTS", ""))}
+# 실패(연결 오류, timeout, 429/5xx) 시 재시도 횟수와 지터를 준 지수 backoff(초)
+NWS_RETRIES = int(os.getenv("NWS_RETRIES", "2"))
+NWS_RETRY_BACKOFF = float(os.getenv("NWS_RETRY_BACKOFF", "0.2"))
+NWS_RETRY_BACKOFF_MAX = float(os.getenv("NWS_RETRY_BACKOFF_MAX", "2"))
+# 업스트림 호출 하나(재시도, hedge, backoff 포함)에 쓰는 전체 시간(초)
+NWS_DEADLINE = float(os.getenv("NWS_DEADLINE", "20"))
+# 응답이 최근 지연의 이 백분위를 넘으면 같은 요청을 한 번 더 보냄 (0이면 hedge 안 함)
+NWS_HEDGE_PERCENTILE = float(os.getenv("NWS_HEDGE_PERCENTILE", "95"))
+NWS_HEDGE_MIN_DELAY = float(os.getenv("NWS_HEDGE_MIN_DELAY", "0.05"))
+# 연속 실패가 이 횟수에 이르면 NWS_BREAKER_COOLDOWN초 동안 업스트림 호출 없이 실패 (캐시된 값으로 대체)
+NWS_BREAKER_THRESHOLD = int(os.getenv("NWS_BREAKER_THRESHOLD", "5"))
+NWS_BREAKER_COOLDOWN = float(os.getenv("NWS_BREAKER_COOLDOWN", "30"))
+# 재시도할 HTTP 상태 코드
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# 연결 풀 설정 (환경 변수로 조정 가능)
+NWS_HTTP2 = os.getenv("NWS_HTTP2", "1") != "0"
+NWS_POOL_MAX_CONNECTIONS = int(os.getenv("NWS_POOL_MAX_CONNECTIONS", "100"))
+NWS_POOL_MAX_KEEPALIVE = int(os.getenv("NWS_POOL_MAX_KEEPALIVE", "20"))
+NWS_POOL_KEEPALIVE_EXPIRY = float(os.getenv("NWS_POOL_KEEPALIVE_EXPIRY", "60"))
+NWS_POOL_MAX_PER_HOST = int(os.getenv("NWS_POOL_MAX_PER_HOST", "20"))
+
+# /points 조회 결과(좌표 -> 예보 격자) 캐시 설정
+GRIDPOINT_CACHE_SIZE = int(os.getenv("NWS_GRIDPOINT_CACHE_SIZE", "4096"))
+GRIDPOINT_CACHE_TTL = float(os.getenv("NWS_GRIDPOINT_CACHE_TTL", "86400"))
+GRIDPOINT_RESOLUTION = float(os.getenv("NWS_GRIDPOINT_RESOLUTION", "0.02"))
+GRIDPOINT_CACHE_FILE = os.getenv("NWS_GRIDPOINT_CACHE_FILE") or None
+
+# HTTP 캐시 헤더(Cache-Control/Expires/ETag)를 따르는 응답 캐시 크기
+RESPONSE_CACHE_SIZE = int(os.getenv("NWS_RESPONSE_CACHE_SIZE", "1024"))
+# 응답 캐시가 보관하는 응답 본문 크기 합계 상한(바이트, 0이면 항목 수로만 제한) - 항목 수만으로는
+# 시간별 예보(디코딩 후 약 290KiB)가 수백 개 쌓이면 Pod memory limit을 넘으므로 크기로도 제한
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("NWS_RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# 여러 위치 예보(get_forecasts) 동시 조회 설정
+BATCH_CONCURRENCY = int(os.getenv("NWS_BATCH_CONCURRENCY", "8"))
+BATCH_MAX_LOCATIONS = int(os.getenv("NWS_BATCH_MAX_LOCATIONS", "50"))
+
+# 전국 특보 피드 백그라운드 수집 (켜면 get_alerts가 업스트림 호출 없이 인덱스에서 응답)
+ALERTS_INGEST = os.getenv("NWS_ALERTS_INGEST", "0") == "1"
+ALERTS_INGEST_INTERVAL = float(os.getenv("NWS_ALERTS_INGEST_INTERVAL", "60"))
+# get_alerts 한 페이지의 기본 특보 수
+ALERTS_PAGE_SIZE = int(os.getenv("NWS_ALERTS_PAGE_SIZE", "50"))
+
+# 만료 후 이 시간(초) 안의 응답은 즉시 반환하고 백그라운드에서 갱신 (stale-while-revalidate, 기본 0은 끔)
+# no-cache/must-revalidate 응답에는 적용하지 않음
+STALE_WHILE_REVALIDATE = float(os.getenv("NWS_STALE_WHILE_REVALIDATE", "0"))
+
+# 만료 전에 미리 갱신할 hot set: 좌표("lat,lon;lat,lon")의 예보/시간별 예보와 주 코드("CA,TX")의 특보
+HOT_LOCATIONS = parse_locations(os.getenv("NWS_HOT_LOCATIONS", ""))
+HOT_STATES = parse_states(os.getenv("NWS_HOT_STATES", ""))
+# 조회 수로 학습해 함께 갱신할 상위 URL 수 (0이면 학습하지 않음)
+HOT_TOP_K = int(os.getenv("NWS_HOT_TOP_K", "0"))
+HOT_REFRESH_INTERVAL = float(os.getenv("NWS_HOT_REFRESH_INTERVAL", "30"))
+HOT_REFRESH_LEAD = float(os.getenv("NWS_HOT_REFRESH_LEAD", "60"))
+HOT_REFRESH_JITTER = float(os.getenv("NWS_HOT_REFRESH_JITTER", "0.2"))
+HOT_REFRESH_CONCURRENCY = int(os.getenv("NWS_HOT_REFRESH_CONCURRENCY", "4"))
+HOT_REFRESH = bool(HOT_LOCATIONS or HOT_STATES or HOT_TOP_K > 0)
+# 조회 수 학습 대상 응답 종류
+HOT_ENDPOINTS = ("forecast", "forecast_hourly", "alerts")
+
+# 영구 저장소(NWS_STORE_PATH)에 기록하는 응답 종류 (/points는 격자 캐시 항목으로 저장)
+STORED_ENDPOINTS = ("forecast", "forecast_hourly", "alerts")
+
+# 예보에 필요한 /points 속성만 캐시에 보관
+GRIDPOINT_FIELDS = ("gridId", "gridX", "gridY", "forecast", "forecastHourly", "forecastGridData")
+
+# 프로세스 전체에서 공유하는 클라이언트와 호스트별 동시 연결 제한
+_client: httpx.AsyncClient | None = None
+_host_limits: dict[str, asyncio.Semaphore] = {}
+# 백그라운드 재검증 태스크 (완료 전에 GC되지 않도록 참조 유지)
+_background: set[asyncio.Task] = set()
+
+
+def alerts_url(*states: str) -> str:
+    """Return the active-alerts URL for one or more state codes (normalized so cache keys match)."""
+    area = ",".join(state.strip().upper() for state in states)
+    return f"{NWS_API_BASE}/alerts/active?area={area}" if area else f"{NWS_API_BASE}/alerts/active"
+
+
+store = NwsStore()
+gridpoints = GridpointCache(
+    maxsize=GRIDPOINT_CACHE_SIZE,
+    ttl=GRIDPOINT_CACHE_TTL,
+    resolution=GRIDPOINT_RESOLUTION,
+    # 영구 저장소를 쓰면 격자 매핑도 그곳에만 저장 (JSON 파일과 이중으로 기록하지 않음)
+    path=None if store.enabled else GRIDPOINT_CACHE_FILE,
+)
+responses = ResponseCache(maxsize=RESPONSE_CACHE_SIZE, max_bytes=RESPONSE_CACHE_MAX_BYTES)
+inflight = SingleFlight()
+alerts = AlertsIndex()
+alerts_ingester = AlertsIngester(
+    alerts,
+    fetch=lambda url: make_nws_request(url),
+    url=alerts_url(),
+    interval=ALERTS_INGEST_INTERVAL,
+)
+resilience = Resilience(
+    NWS_TIMEOUTS,
+    default_timeout=REQUEST_TIMEOUT,
+    retries=NWS_RETRIES,
+    backoff=NWS_RETRY_BACKOFF,
+    backoff_max=NWS_RETRY_BACKOFF_MAX,
+    hedge_percentile=NWS_HEDGE_PERCENTILE,
+    hedge_min_delay=NWS_HEDGE_MIN_DELAY,
+    breaker_threshold=NWS_BREAKER_THRESHOLD,
+    breaker_cooldown=NWS_BREAKER_COOLDOWN,
+    deadline=NWS_DEADLINE,
+)
+hot = HotRefresher(
+    refresh=lambda url: inflight.do(url, lambda: _fetch(url)),
+    expires_in=lambda url: entry.expires_in() if (entry := responses.get(url)) is not None else None,
+    configured=lambda: configured_hot_urls(),
+    top_k=HOT_TOP_K,
+    interval=HOT_REFRESH_INTERVAL,
+    lead=HOT_REFRESH_LEAD,
+    jitter=HOT_REFRESH_JITTER,
+    concurrency=HOT_REFRESH_CONCURRENCY,
+)
+
+# 업스트림 지연/결과를 엔드포인트 종류별로 기록하고 캐시 적중률을 노출
+upstream_latency = metrics.registry.histogram(
+    "nws_upstream_request_seconds", "NWS API request latency by endpoint type.", ("endpoint",))
+upstream_requests = metrics.registry.counter(
+    "nws_upstream_requests_total", "NWS API requests by endpoint type and HTTP status.", ("endpoint", "status"))
+stale_fallbacks = metrics.registry.counter(
+    "nws_stale_fallbacks_total", "Cached responses returned because the upstream request failed.", ("endpoint",))
+
+
+def _hit_ratio(stats: dict[str, int], *hit_keys: str) -> float | None:
+    hits = sum(stats[key] for key in hit_keys)
+    total = hits + stats["misses"]
+    return hits / total if total else None
+
+
+metrics.registry.callback(
+    "nws_cache_hit_ratio", "Share of lookups served without a full upstream fetch.",
+    lambda: {("response",): _hit_ratio(responses.stats(), "hits", "stale", "revalidations"),
+             ("gridpoint",): _hit_ratio(gridpoints.stats(), "hits")},
+    ("cache",))
+metrics.registry.callback(
+    "nws_cache_lookups_total", "Cache lookups by cache and result.",
+    lambda: {(name, key): value
+             for name, stats in (("response", responses.stats()), ("gridpoint", gridpoints.stats()))
+             for key, value in stats.items() if key in ("hits", "stale", "revalidations", "misses")},
+    ("cache", "result"), kind="counter")
+metrics.registry.callback(
+    "nws_cache_entries", "Entries held by each cache.",
+    lambda: {("response",): responses.stats()["size"], ("gridpoint",): gridpoints.stats()["size"]}, ("cache",))
+metrics.registry.callback(
+    "nws_response_cache_bytes", "Approximate payload bytes held by the NWS response cache.",
+    lambda: responses.bytes)
+metrics.registry.callback(
+    "nws_singleflight_coalesced_total", "Requests that joined an identical in-flight upstream fetch.",
+    lambda: inflight.coalesced, kind="counter")
+metrics.registry.callback(
+    "nws_hot_refreshes_total", "Background refreshes of hot URLs by result.",
+    lambda: {("ok",): hot.refreshes, ("error",): hot.failures}, ("result",), kind="counter")
+metrics.registry.callback(
+    "nws_hot_urls", "URLs the background refresher keeps fresh.", lambda: len(hot.hot_urls))
+
+
+def endpoint_type(url: str) -> str:
+    """Classify an NWS URL as points, forecast, forecast_hourly, alerts or other."""
+    path = urlsplit(url).path
+    if path.startswith("/points/"):
+        return "points"
+    if path.startswith("/alerts"):
+        return "alerts"
+    if path.endswith("/forecast/hourly"):
+        return "forecast_hourly"
+    if path.endswith("/forecast"):
+        return "forecast"
+    return "other"
+
+
+def _http2_available() -> bool:
+    """Return True if the optional h2 package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=NWS_HTTP2 and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=NWS_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=NWS_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=NWS_POOL_KEEPALIVE_EXPIRY,
+            ),
+            timeout=REQUEST_TIMEOUT,
+            headers={
+                "User-Agent": USER_AGENT,
+                "Accept": "application/geo+json"
+            },
+        )
+    return _client
+
+
+async def aclose_client() -> None:
+    """Close the shared AsyncClient and release its pooled connections."""
+    global _client
+    client, _client = _client, None
+    _host_limits.clear()
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def lifespan(_app: Any = None, eager_client: bool = True):
+    """Own the shared client for the lifetime of a Starlette app or stdio server.
+
+    With ``eager_client=False`` the client (TLS context, h2/h11 imports) is
+    created by the first NWS request instead of before the server answers.
+    """
+    gridpoints.load()
+    # 저장소 내용은 백그라운드에서 캐시로 불러옴 (그동안 들어온 요청은 평소처럼 처리)
+    await store.open(gridpoints.restore, responses.restore)
+    if eager_client:
+        get_client()
+    await cpu_pool.start()
+    if ALERTS_INGEST:
+        alerts_ingester.start()
+    if HOT_REFRESH:
+        hot.start()
+    try:
+        yield
+    finally:
+        await hot.stop()
+        await alerts_ingester.stop()
+        await store.close()
+        await aclose_client()
+        cpu_pool.shutdown()
+        # 볼륨이 읽기 전용이거나 가득 찼거나 이미 분리된 경우에도 종료 절차를 막지 않도록 기록만 남김
+        try:
+            gridpoints.save()
+        except OSError as e:
+            print(f"[WARN] Gridpoint cache save to {gridpoints.path} failed: {e}", file=sys.stderr)
+
+
+def _host_limit(url: str) -> asyncio.Semaphore:
+    """Return the semaphore that caps concurrent connections to the URL's host."""
+    host = urlsplit(url).netloc
+    limit = _host_limits.get(host)
+    if limit is None:
+        limit = _host_limits[host] = asyncio.Semaphore(NWS_POOL_MAX_PER_HOST)
+    return limit
+
+
+async def make_nws_request(url: str) -> dict[str, Any] | None:
+    """Make a request to the NWS API with proper error handling.
+
+    Fresh cached responses are returned without I/O; stale ones are
+    revalidated with a conditional GET so a 304 reuses the parsed body.
+    Concurrent requests for the same URL share one upstream fetch.
+    A response that went stale less than ``STALE_WHILE_REVALIDATE`` seconds
+    ago is returned at once while it is refreshed in the background, unless
+    it was sent with no-cache or must-revalidate.
+    """
+    if HOT_TOP_K > 0 and endpoint_type(url) in HOT_ENDPOINTS:
+        hot.record(url)
+    cached = responses.get(url)
+    if cached is not None:
+        if cached.is_fresh():
+            responses.hits += 1
+            return cached.data
+        if not cached.must_revalidate and -cached.expires_in() < STALE_WHILE_REVALIDATE:
+            responses.stale += 1
+            _revalidate_in_background(url)
+            return cached.data
+    return await inflight.do(url, lambda: _fetch(url))
+
+
+def _revalidate_in_background(url: str) -> None:
+    """Start refreshing ``url`` upstream unless a fetch for it is already running."""
+    if inflight.running(url):
+        return
+    task = asyncio.ensure_future(inflight.do(url, lambda: _fetch(url)))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def _get(url: str, headers: dict[str, str], endpoint: str) -> httpx.Response:
+    """Send one GET upstream under the per-host connection limit."""
+    async with _host_limit(url):
+        start = time.perf_counter()
+        try:
+            response = await get_client().get(url, headers=headers)
+        except Exception:
+            upstream_requests.inc(endpoint, "error")
+            raise
+        finally:
+            upstream_latency.observe(time.perf_counter() - start, endpoint)
+    upstream_requests.inc(endpoint, str(response.status_code))
+    return response
+
+
+async def _fetch(url: str) -> dict[str, Any] | None:
+    """Fetch a URL upstream, revalidating any stale cached copy.
+
+    Timeouts, retries, hedging and the circuit breaker come from ``resilience``;
+    when the upstream still fails the last cached copy is returned, stale or not.
+    """
+    cached = responses.get(url)
+    headers = cached.conditional_headers() if cached is not None else {}
+    endpoint = endpoint_type(url)
+    try:
+        response = await resilience.call(endpoint, lambda: _get(url, headers, endpoint),
+                                         lambda response: response.status_code in RETRY_STATUSES)
+    except Exception:
+        # timeout, 연결 오류, circuit open
+        return _fallback(endpoint, cached)
+    try:
+        if response.status_code == 304 and cached is not None:
+            data = responses.refresh(url, response.headers)
+            _persist(url, endpoint)
+            return data
+        response.raise_for_status()
+        # 대규모 특보 피드 같은 큰 응답은 프로세스 풀에서 파싱해 이벤트 루프를 막지 않음
+        data = await cpu_pool.run(nws_json.decode, response.content,
+                                  offload=len(response.content) >= cpu_pool.CPU_POOL_MIN_BYTES)
+    except Exception:
+        return _fallback(endpoint, cached)
+    responses.misses += 1
+    responses.store(url, data, response.headers, len(response.content))
+    _persist(url, endpoint)
+    return data
+
+
+def _fallback(endpoint: str, cached: CachedResponse | None) -> Any:
+    """Return the last cached data after an upstream failure, or None when nothing is cached."""
+    if cached is None:
+        return None
+    stale_fallbacks.inc(endpoint)
+    return cached.data
+
+
+def _persist(url: str, endpoint: str) -> None:
+    """Queue the cached response for ``url`` for the persistent store (written in the background)."""
+    if not store.enabled or endpoint not in STORED_ENDPOINTS:
+        return
+    entry = responses.get(url)
+    if entry is not None:
+        store.save_response(url, entry.data, entry.fresh_until_wall(), entry.etag, entry.last_modified)
+
+
+async def resolve_gridpoint(latitude: float, longitude: float) -> dict[str, Any] | None:
+    """Return the /points properties for a coordinate, served from cache when possible."""
+    cached = gridpoints.get(latitude, longitude)
+    if cached is not None:
+        return cached
+    data = await make_nws_request(f"{NWS_API_BASE}/points/{latitude},{longitude}")
+    if not data or "forecast" not in data.get("properties", {}):
+        return None
+    props = data["properties"]
+    gridpoint = {field: props.get(field) for field in GRIDPOINT_FIELDS}
+    gridpoints.put(latitude, longitude, gridpoint)
+    store.save_gridpoint(gridpoints.key(latitude, longitude), gridpoint, time.time() + gridpoints.ttl)
+    return gridpoint
+
+
+async def configured_hot_urls() -> list[str]:
+    """Return the forecast and alert URLs of the configured hot set (NWS_HOT_LOCATIONS/NWS_HOT_STATES)."""
+    # 특보 인덱스가 켜져 있으면 get_alerts가 업스트림을 조회하지 않으므로 특보 URL은 제외
+    urls = [] if ALERTS_INGEST else [alerts_url(state) for state in HOT_STATES]
+    for latitude, longitude in HOT_LOCATIONS:
+        gridpoint = await resolve_gridpoint(latitude, longitude)
+        if gridpoint:
+            urls.extend(url for url in (gridpoint["forecast"], gridpoint.get("forecastHourly")) if url)
+    return urls
+
+
+async def fetch_forecasts(locations: list[tuple[float, float]],
+                          concurrency: int = BATCH_CONCURRENCY) -> list[dict[str, Any]]:
+    """Fetch forecast periods for many coordinates with bounded concurrency.
+
+    Coordinates that quantize to the same grid cell are resolved once, and each
+    distinct forecast URL is fetched once. Returns one result per input location,
+    in order, with ``periods`` set on success or ``error`` set to ``"points"`` or
+    ``"forecast"`` naming the step that failed.
+    """
+    limit = asyncio.Semaphore(concurrency)
+
+    async def bounded(fn, *args):
+        async with limit:
+            return await fn(*args)
+
+    # 1. 같은 격자 셀로 양자화되는 좌표는 한 번만 /points 조회
+    cells: dict[str, tuple[float, float]] = {}
+    for latitude, longitude in locations:
+        cells.setdefault(gridpoints.key(latitude, longitude), (latitude, longitude))
+    resolved = await asyncio.gather(*(bounded(resolve_gridpoint, *coord) for coord in cells.values()))
+    cell_points = dict(zip(cells, resolved))
+
+    # 2. 서로 다른 예보 URL만 조회
+    urls = list({gp["forecast"] for gp in resolved if gp})
+    fetched = await asyncio.gather(*(bounded(make_nws_request, url) for url in urls))
+    forecasts = dict(zip(urls, fetched))
+
+    results = []
+    for latitude, longitude in locations:
+        result: dict[str, Any] = {"latitude": latitude, "longitude": longitude, "periods": None, "error": None}
+        gridpoint = cell_points[gridpoints.key(latitude, longitude)]
+        data = forecasts.get(gridpoint["forecast"]) if gridpoint else None
+        if not gridpoint:
+            result["error"] = "points"
+        elif not data or not data.get("properties", {}).get("periods"):
+            result["error"] = "forecast"
+        else:
+            result["periods"] = data["properties"]["periods"]
+        results.append(result)
+    return results
+
+
+def indexed_alerts(states: list[str] | None = None,
+                   severities: list[str] | None = None) -> list[dict] | None:
+    """Return alerts from the background index, or None when it cannot serve them."""
+    if not alerts_ingester.ready():
+        return None
+    return alerts.query(states=states, severities=severities)
+
+
+async def fetch_alerts_for_states(states: list[str],
+                                  severities: list[str] | None = None) -> dict[str, list[dict]] | None:
+    """Return active alerts grouped by state, from the index or one upstream call."""
+    states = [state.strip().upper() for state in states]
+    index = alerts if alerts_ingester.ready() else None
+    if index is None:
+        # NWS는 area 파라미터에 여러 코드를 쉼표로 받으므로 한 번만 조회
+        data = await make_nws_request(alerts_url(*states))
+        if not data or "features" not in data:
+            return None
+        index = AlertsIndex.from_features(data["features"])
+    return {state: index.query(states=[state], severities=severities) for state in states}
@@ -0,0 +1,56 @@
+# NWS GeoJSON 응답 디코딩: 빠른 파서(orjson)를 우선 사용하고 도구가 쓰지 않는 필드는 버림
+from typing import Any
+import json
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성: 없으면 표준 json 사용
+    orjson = None
+
+# 특보 도구(format_alert, AlertsIndex)가 읽는 속성만 유지
+ALERT_PROPERTIES = (
+    "id", "areaDesc", "geocode", "sent", "effective", "onset", "expires", "ends",
+    "status", "messageType", "severity", "certainty", "urgency", "event",
+    "headline", "description", "instruction",
+)
+
+# 도구가 읽지 않는 큰 최상위 필드 (폴리곤 geometry, JSON-LD context)
+DROPPED_KEYS = ("geometry", "@context")
+
+
+def loads(content: bytes | str) -> Any:
+    """Decode JSON with orjson when it is installed, else the standard library."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def slim(data: Any) -> Any:
+    """Strip geometry blobs and unused alert properties from a decoded NWS payload.
+
+    The result is what make_nws_request returns and what the response cache
+    keeps, so this bounds both per-call and retained memory.
+    """
+    if not isinstance(data, dict):
+        return data
+    for key in DROPPED_KEYS:
+        data.pop(key, None)
+    features = data.get("features")
+    if isinstance(features, list):
+        data["features"] = [_slim_alert(feature) for feature in features]
+    return data
+
+
+def _slim_alert(feature: Any) -> Any:
+    if not isinstance(feature, dict):
+        return feature
+    props = feature.get("properties") or {}
+    return {
+        "id": feature.get("id"),
+        "properties": {key: props[key] for key in ALERT_PROPERTIES if key in props},
+    }
+
+
+def decode(content: bytes | str) -> Any:
+    """Decode and slim an NWS response body."""
+    return slim(loads(content))
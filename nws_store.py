@@ -0,0 +1,215 @@
+# 재시작 후에도 warm 상태로 시작하기 위한 NWS 격자/예보/특보 응답의 로컬 영구 저장소 (SQLite, 선택 기능)
+#
+# 시작할 때 백그라운드 스레드에서 만료되지 않은(또는 재검증 가능한) 항목을 메모리 캐시로 불러오고,
+# 요청 처리 중에는 변경 내용을 메모리에 모아 두었다가 주기적으로 스레드에서 한 트랜잭션으로 기록합니다.
+# 오래된 행은 주기적으로 삭제하고 WAL 파일을 정리합니다. 요청 경로에서는 디스크 I/O를 하지 않습니다.
+from typing import Any, Callable
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import metrics
+
+# SQLite 파일 경로 (비어 있으면 비활성)
+NWS_STORE_PATH = os.getenv("NWS_STORE_PATH", "")
+# 모아 둔 변경 내용을 기록하는 주기(초)
+NWS_STORE_FLUSH_INTERVAL = float(os.getenv("NWS_STORE_FLUSH_INTERVAL", "5"))
+# 오래된 행 삭제와 WAL 정리 주기(초)
+NWS_STORE_COMPACT_INTERVAL = float(os.getenv("NWS_STORE_COMPACT_INTERVAL", "3600"))
+# 만료 후에도 ETag 재검증/장애 시 대체 응답용으로 보관하는 시간(초)
+NWS_STORE_MAX_STALE = float(os.getenv("NWS_STORE_MAX_STALE", "86400"))
+
+# 읽기에 사용할 메모리 매핑 크기 (SQLite mmap_size)
+MMAP_SIZE = 64 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gridpoints (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    fresh_until REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS gridpoints_expires ON gridpoints (expires_at);
+CREATE INDEX IF NOT EXISTS responses_fresh ON responses (fresh_until);
+"""
+
+
+class NwsStore:
+    """SQLite store behind the gridpoint and response caches, written behind and loaded in the background.
+
+    Expiry times are stored as wall-clock timestamps so they survive restarts.
+    """
+
+    def __init__(self, path: str = NWS_STORE_PATH, flush_interval: float = NWS_STORE_FLUSH_INTERVAL,
+                 compact_interval: float = NWS_STORE_COMPACT_INTERVAL, max_stale: float = NWS_STORE_MAX_STALE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.max_stale = max_stale
+        self._db = None
+        # 여러 스레드(to_thread)에서 하나의 연결을 쓰므로 직렬화
+        self._lock = threading.Lock()
+        # 기록 대기 중인 변경 내용 (같은 키는 마지막 값만 기록)
+        self._gridpoints: dict[str, tuple[str, Any, float]] = {}
+        self._responses: dict[str, tuple[str, Any, float, str | None, str | None]] = {}
+        self._tasks: list[asyncio.Task] = []
+        self.loaded = 0
+        self.writes_total = metrics.registry.counter(
+            "nws_store_writes_total", "Rows written to the persistent NWS store.", ("table",))
+        self.compactions_total = metrics.registry.counter(
+            "nws_store_compactions_total", "Compactions of the persistent NWS store.")
+        metrics.registry.callback("nws_store_pending_writes", "Changes waiting to be written to the NWS store.",
+                                  lambda: len(self._gridpoints) + len(self._responses))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connect(self) -> None:
+        # 저장소를 켤 때만 import (기본 비활성)
+        import sqlite3
+
+        db = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        try:
+            # 다중 워커가 같은 파일을 써도 읽기가 쓰기를 막지 않도록 WAL 사용
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            db.executescript(SCHEMA)
+            # 손상된 파일은 시작할 때 발견해 저장소 없이 진행 (요청 처리 중 오류가 나지 않도록)
+            if db.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                raise sqlite3.DatabaseError(f"{self.path} failed quick_check")
+        except BaseException:
+            db.close()
+            raise
+        self._db = db
+
+    def _load(self) -> list[tuple]:
+        with self._lock:
+            cutoff = time.time() - self.max_stale
+            gridpoints = self._db.execute(
+                "SELECT key, value, expires_at FROM gridpoints WHERE expires_at > ?", (time.time(),)).fetchall()
+            responses = self._db.execute(
+                "SELECT url, data, fresh_until, etag, last_modified FROM responses WHERE fresh_until > ?",
+                (cutoff,)).fetchall()
+        # JSON 디코딩도 이벤트 루프 밖(이 스레드)에서 처리
+        return ([("gridpoint", key, expires_at, json.loads(value)) for key, value, expires_at in gridpoints]
+                + [("response", url, fresh_until, json.loads(data), etag, last_modified, len(data))
+                   for url, data, fresh_until, etag, last_modified in responses])
+
+    async def _load_into(self, restore_gridpoint: Callable[[str, float, Any], bool],
+                         restore_response: Callable[..., bool]) -> None:
+        try:
+            rows = await asyncio.to_thread(self._load)
+        except Exception as e:
+            print(f"[WARN] NWS store load failed: {e}", file=sys.stderr)
+            return
+        for row in rows:
+            # 시작 후 이미 새로 받아 온 항목은 덮어쓰지 않음
+            if row[0] == "gridpoint":
+                self.loaded += restore_gridpoint(*row[1:])
+            else:
+                self.loaded += restore_response(*row[1:])
+
+    async def open(self, restore_gridpoint: Callable[[str, float, Any], bool],
+                   restore_response: Callable[..., bool]) -> None:
+        """Open the database and start loading it into the caches in the background.
+
+        ``restore_gridpoint(key, expires_at, value)`` and ``restore_response(url,
+        fresh_until, data, etag, last_modified, size)`` add one entry to a cache unless
+        it already holds one, returning True when they did. A path that cannot
+        be opened or a corrupt file is logged and the store stays disabled, so
+        the server still starts (without persistence).
+        """
+        if not self.enabled or self._db is not None:
+            return
+        import sqlite3
+
+        try:
+            await asyncio.to_thread(self._connect)
+        except (OSError, sqlite3.Error) as e:
+            print(f"[WARN] NWS store {self.path} unavailable, continuing without it: {e}", file=sys.stderr)
+            self.path = ""
+            return
+        self._tasks = [
+            asyncio.create_task(self._load_into(restore_gridpoint, restore_response)),
+            asyncio.create_task(self._every(self.flush_interval, self.flush)),
+            asyncio.create_task(self._every(self.compact_interval, self.compact)),
+        ]
+
+    async def _every(self, interval: float, fn: Callable[[], Any]) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await fn()
+            except Exception as e:
+                print(f"[WARN] NWS store {fn.__name__} failed: {e}", file=sys.stderr)
+
+    def save_gridpoint(self, key: str, value: Any, expires_at: float) -> None:
+        if self._db is not None:
+            self._gridpoints[key] = (key, value, expires_at)
+
+    def save_response(self, url: str, data: Any, fresh_until: float, etag: str | None,
+                      last_modified: str | None) -> None:
+        if self._db is not None:
+            self._responses[url] = (url, data, fresh_until, etag, last_modified)
+
+    def _write(self, gridpoints: list[tuple], responses: list[tuple]) -> None:
+        gridpoint_rows = [(key, json.dumps(value), expires_at) for key, value, expires_at in gridpoints]
+        response_rows = [(url, json.dumps(data), fresh_until, etag, last_modified)
+                         for url, data, fresh_until, etag, last_modified in responses]
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO gridpoints VALUES (?, ?, ?)", gridpoint_rows)
+                self._db.executemany("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)", response_rows)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    async def flush(self) -> None:
+        """Write the pending changes in one transaction, off the event loop."""
+        if self._db is None or not (self._gridpoints or self._responses):
+            return
+        gridpoints, self._gridpoints = list(self._gridpoints.values()), {}
+        responses, self._responses = list(self._responses.values()), {}
+        await asyncio.to_thread(self._write, gridpoints, responses)
+        self.writes_total.inc("gridpoints", amount=len(gridpoints))
+        self.writes_total.inc("responses", amount=len(responses))
+
+    def _compact(self) -> None:
+        with self._lock:
+            now = time.time()
+            self._db.execute("DELETE FROM gridpoints WHERE expires_at <= ?", (now,))
+            self._db.execute("DELETE FROM responses WHERE fresh_until <= ?", (now - self.max_stale,))
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    async def compact(self) -> None:
+        """Delete expired rows and truncate the WAL."""
+        if self._db is None:
+            return
+        await asyncio.to_thread(self._compact)
+        self.compactions_total.inc()
+
+    async def close(self) -> None:
+        """Stop the background tasks and write what is still pending."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._db is None:
+            return
+        try:
+            await self.flush()
+        finally:
+            db, self._db = self._db, None
+            db.close()
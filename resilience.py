@@ -0,0 +1,221 @@
+# NWS 업스트림 호출 보호: 엔드포인트별 timeout, 지터를 준 재시도, 지연 백분위를 넘으면 보내는 hedge 요청,
+# 연속 실패 시 빠르게 실패하는 circuit breaker
+#
+# 호출 하나(attempt)는 응답을 반환하거나 예외를 던지는 코루틴 함수이고, is_failure(result)가 True인 응답
+# (예: 429/5xx)도 실패로 보고 재시도합니다. 재시도와 hedge는 호출 전체의 deadline 안에서만 실행하고,
+# 모든 재시도가 실패하거나 deadline이 지나면 마지막 응답을 반환하거나 마지막 예외를 다시 던지며,
+# 캐시된 값으로 대체할지는 호출자가 정합니다. circuit breaker에는 호출 하나를 실패 한 번으로 기록합니다.
+from typing import Any, Awaitable, Callable
+from collections import deque
+import asyncio
+import random
+import time
+import metrics
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while an endpoint's circuit is open."""
+
+
+def parse_timeouts(value: str) -> dict[str, float]:
+    """Parse ``"endpoint=seconds,endpoint=seconds"`` into a per-endpoint timeout mapping."""
+    timeouts = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, sep, seconds = item.partition("=")
+        if not sep:
+            raise ValueError(f"NWS_TIMEOUTS entries must look like endpoint=seconds, not {item!r}")
+        timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+class CircuitBreaker:
+    """Open after ``threshold`` consecutive failures, then let one probe through every ``cooldown`` seconds."""
+
+    CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            # 대기 시간이 지나면 시험 요청 하나만 통과시킴 (결과가 나올 때까지 나머지는 거부)
+            self.state = self.HALF_OPEN
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self) -> None:
+        """Give up a probe that ended without a result (cancelled) so the next call can probe."""
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+
+    def success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.opened += 1
+
+
+class Resilience:
+    """Timeouts, jittered retries, hedged requests and a circuit breaker per endpoint type."""
+
+    def __init__(self, timeouts: dict[str, float], default_timeout: float = 30.0, retries: int = 2,
+                 backoff: float = 0.2, backoff_max: float = 2.0, hedge_percentile: float = 95.0,
+                 hedge_min_delay: float = 0.05, hedge_window: int = 200, breaker_threshold: int = 5,
+                 breaker_cooldown: float = 30.0, deadline: float = 20.0):
+        self.timeouts = timeouts
+        self.default_timeout = default_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_window = hedge_window
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.deadline = deadline
+        self.breakers: dict[str, CircuitBreaker] = {}
+        # 엔드포인트별 최근 성공 지연 시간 (hedge 지연 계산용)
+        self._latencies: dict[str, deque[float]] = {}
+        self._samples: dict[str, int] = {}
+        self._hedge_delays: dict[str, float] = {}
+        self.retries_total = metrics.registry.counter(
+            "nws_upstream_retries_total", "NWS API requests retried after a failure.", ("endpoint",))
+        self.timeouts_total = metrics.registry.counter(
+            "nws_upstream_timeouts_total", "NWS API attempts that hit the endpoint timeout.", ("endpoint",))
+        self.hedges_total = metrics.registry.counter(
+            "nws_upstream_hedges_total", "Hedged NWS API requests sent, and how many answered first.",
+            ("endpoint", "result"))
+        metrics.registry.callback(
+            "nws_circuit_state", "Circuit breaker state by endpoint (0 closed, 1 open, 2 half-open).",
+            lambda: {(name,): breaker.state for name, breaker in self.breakers.items()}, ("endpoint",))
+        metrics.registry.callback(
+            "nws_circuit_opened_total", "Times the circuit breaker opened.",
+            lambda: {(name,): breaker.opened for name, breaker in self.breakers.items()}, ("endpoint",),
+            kind="counter")
+        metrics.registry.callback(
+            "nws_circuit_rejected_total", "Requests failed fast while the circuit was open.",
+            lambda: {(name,): breaker.rejected for name, breaker in self.breakers.items()}, ("endpoint",),
+            kind="counter")
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+        return breaker
+
+    def hedge_delay(self, endpoint: str) -> float | None:
+        """Return how long to wait before hedging, or None until enough latencies are known."""
+        return self._hedge_delays.get(endpoint)
+
+    def _record_latency(self, endpoint: str, seconds: float) -> None:
+        if self.hedge_percentile <= 0:
+            return
+        window = self._latencies.get(endpoint)
+        if window is None:
+            window = self._latencies[endpoint] = deque(maxlen=self.hedge_window)
+        window.append(seconds)
+        samples = self._samples[endpoint] = self._samples.get(endpoint, 0) + 1
+        # 매 요청마다 정렬하지 않도록 20개가 모인 뒤 10개마다 한 번만 백분위를 다시 계산
+        if samples >= 20 and samples % 10 == 0:
+            ordered = sorted(window)
+            index = min(len(ordered) - 1, int(self.hedge_percentile / 100 * len(ordered)))
+            self._hedge_delays[endpoint] = max(self.hedge_min_delay, ordered[index])
+
+    async def _attempt(self, endpoint: str, attempt: Callable[[], Awaitable[Any]],
+                       is_failure: Callable[[Any], bool], timeout: float) -> Any:
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(attempt(), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts_total.inc(endpoint)
+            raise
+        if not is_failure(result):
+            self._record_latency(endpoint, time.monotonic() - start)
+        return result
+
+    async def _hedged(self, endpoint: str, attempt: Callable[[], Awaitable[Any]],
+                      is_failure: Callable[[Any], bool], timeout: float) -> Any:
+        first = asyncio.ensure_future(self._attempt(endpoint, attempt, is_failure, timeout))
+        pending = {first}
+        try:
+            delay = self.hedge_delay(endpoint)
+            if delay is None or delay >= timeout:
+                return await first
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+            # 첫 요청이 평소의 백분위 지연을 넘기면 같은 요청을 하나 더 보내고 먼저 성공한 응답을 사용
+            # (두 요청 모두 첫 요청의 timeout 안에 끝나도록 남은 시간만 줌)
+            self.hedges_total.inc(endpoint, "sent")
+            second = asyncio.ensure_future(self._attempt(endpoint, attempt, is_failure, timeout - delay))
+            pending.add(second)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and not is_failure(task.result()):
+                        if task is second:
+                            self.hedges_total.inc(endpoint, "won")
+                        return task.result()
+            # 둘 다 실패하면 마지막으로 끝난 요청의 결과(또는 예외)를 전달
+            return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, endpoint: str, attempt: Callable[[], Awaitable[Any]],
+                   is_failure: Callable[[Any], bool] = lambda result: False) -> Any:
+        """Run ``attempt`` with the endpoint's timeout, hedging, retries and circuit breaker.
+
+        Every attempt, hedge and backoff fits in ``deadline`` seconds overall; once it
+        is spent the last response is returned or the last error re-raised.
+        Raises CircuitOpenError without calling upstream while the circuit is open.
+        """
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            raise CircuitOpenError(f"circuit open for {endpoint}")
+        timeout = self.timeouts.get(endpoint, self.default_timeout)
+        deadline = time.monotonic() + self.deadline
+        result: Any = None
+        error: Exception | None = None
+        for retry in range(self.retries + 1):
+            try:
+                result = await self._hedged(endpoint, attempt, is_failure,
+                                            min(timeout, deadline - time.monotonic()))
+                error = None
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                error = e
+            else:
+                if not is_failure(result):
+                    breaker.success()
+                    return result
+            # full jitter: 0 ~ min(backoff_max, backoff * 2^retry) 사이에서 무작위로 대기
+            delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** retry))
+            # 마지막 시도이거나, 대기 후 남는 시간이 없거나, 다른 호출로 circuit이 열렸으면 중단
+            if (retry == self.retries or time.monotonic() + delay >= deadline
+                    or breaker.state == CircuitBreaker.OPEN):
+                break
+            self.retries_total.inc(endpoint)
+            await asyncio.sleep(delay)
+        breaker.failure()
+        if error is not None:
+            raise error
+        return result
@@ -0,0 +1,116 @@
+# SSE 세션 ID -> 세션을 가진 replica 주소 레지스트리와 replica 간 /messages/ 전달
+from typing import Any
+import os
+import httpx
+
+# 레지스트리 백엔드: memory(프로세스 내, 기본) 또는 redis://... (replica 간 공유, redis 패키지 필요)
+SESSION_REGISTRY_URL = os.getenv("SESSION_REGISTRY_URL", "memory")
+# 이 replica의 내부 주소 (예: http://10.0.0.12:8000). 비어 있으면 replica 간 전달을 하지 않음
+SESSION_OWNER_URL = os.getenv("SESSION_OWNER_URL", "")
+# 레지스트리 항목 유효 시간(초) - Pod가 비정상 종료해도 항목이 영구히 남지 않도록
+SESSION_REGISTRY_TTL = int(os.getenv("SESSION_REGISTRY_TTL", "86400"))
+# replica 간 전달에 사용하는 연결 풀 크기와 타임아웃
+SESSION_FORWARD_MAX_CONNECTIONS = int(os.getenv("SESSION_FORWARD_MAX_CONNECTIONS", "100"))
+SESSION_FORWARD_TIMEOUT = float(os.getenv("SESSION_FORWARD_TIMEOUT", "30"))
+
+# 전달된 요청임을 표시하는 헤더 (값: replica 또는 worker, 같은 단계로 다시 전달하지 않아 전달 루프 방지)
+FORWARDED_HEADER = "x-mcp-forwarded"
+
+
+class InMemorySessionRegistry:
+    """Session registry held in process memory.
+
+    Only replicas running in the same process see each other's sessions, which
+    is enough for a single replica and for exercising forwarding locally.
+    """
+
+    def __init__(self):
+        self._owners: dict[str, str] = {}
+
+    async def register(self, session_id: str, owner: str) -> None:
+        self._owners[session_id] = owner
+
+    async def lookup(self, session_id: str) -> str | None:
+        return self._owners.get(session_id)
+
+    async def unregister(self, session_id: str) -> None:
+        self._owners.pop(session_id, None)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class RedisSessionRegistry:
+    """Session registry shared by replicas through Redis keys with a TTL."""
+
+    def __init__(self, url: str, ttl: int = SESSION_REGISTRY_TTL, prefix: str = "mcp:session:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("SESSION_REGISTRY_URL=redis://... requires the redis package") from e
+        self._redis = redis.from_url(url, decode_responses=True)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def register(self, session_id: str, owner: str) -> None:
+        await self._redis.set(self.prefix + session_id, owner, ex=self.ttl)
+
+    async def lookup(self, session_id: str) -> str | None:
+        return await self._redis.get(self.prefix + session_id)
+
+    async def unregister(self, session_id: str) -> None:
+        await self._redis.delete(self.prefix + session_id)
+
+    async def aclose(self) -> None:
+        await self._redis.aclose()
+
+
+def create_registry(url: str = SESSION_REGISTRY_URL):
+    """Return the registry backend named by ``url`` ("memory" or a redis:// URL)."""
+    if url in ("", "memory"):
+        return InMemorySessionRegistry()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSessionRegistry(url)
+    raise ValueError(f"Unsupported SESSION_REGISTRY_URL: {url!r}")
+
+
+class SessionForwarder:
+    """Forward /messages/ POSTs to the replica that owns the session over pooled connections."""
+
+    def __init__(self, max_connections: int = SESSION_FORWARD_MAX_CONNECTIONS,
+                 timeout: float = SESSION_FORWARD_TIMEOUT):
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+        self.forwarded = 0
+        self.failures = 0
+
+    async def forward(self, owner: str, session_id: str, body: bytes, content_type: str | None,
+                      hop: str = "replica") -> tuple[int, bytes, str | None] | None:
+        """POST ``body`` to ``owner``; return (status, body, content type), or None if unreachable."""
+        headers: dict[str, Any] = {FORWARDED_HEADER: hop}
+        if content_type:
+            headers["content-type"] = content_type
+        try:
+            response = await self._client.post(
+                f"{owner.rstrip('/')}/messages/", params={"session_id": session_id},
+                content=body, headers=headers,
+            )
+        except httpx.HTTPError:
+            self.failures += 1
+            return None
+        self.forwarded += 1
+        return response.status_code, response.content, response.headers.get("content-type")
+
+    async def get_text(self, url: str) -> str | None:
+        """GET ``url`` over the same pool (e.g. a sibling worker's /metrics); None on failure."""
+        try:
+            response = await self._client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            return None
+        return response.text
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
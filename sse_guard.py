@@ -0,0 +1,222 @@
+# SSE 세션별 송신 버퍼 제한, 느린 소비자 처리, 유휴 세션 정리, keepalive 주기, 최대 세션 수 제한
+#
+# MCP SSE transport는 클라이언트가 읽는 속도에 맞춰 도구 결과를 기다리게 하므로, 느리거나 버려진
+# 클라이언트가 있으면 결과와 처리 태스크가 메모리에 계속 쌓입니다. 세션마다 크기가 제한된 버퍼를
+# 두고 별도 태스크가 소켓으로 내보내며, 버퍼가 넘치면 정책에 따라 이벤트를 버리거나 연결을 끊습니다.
+from collections import deque
+from typing import Any
+import asyncio
+import functools
+import os
+import time
+from sse_starlette.sse import EventSourceResponse
+import mcp.server.sse as mcp_sse
+import metrics
+
+# 워커 프로세스당 최대 SSE 세션 수 (0이면 제한 없음, 초과 시 503)
+SSE_MAX_SESSIONS = int(os.getenv("SSE_MAX_SESSIONS", "0"))
+# 세션별 송신 버퍼 크기(바이트) - 클라이언트가 읽지 않아 이보다 많이 쌓이면 느린 소비자로 처리
+SSE_MAX_BUFFER_BYTES = int(os.getenv("SSE_MAX_BUFFER_BYTES", "262144"))
+# 느린 소비자 처리 정책: disconnect(연결 종료, 기본) 또는 drop(넘치는 이벤트 버림)
+SSE_SLOW_CONSUMER_POLICY = os.getenv("SSE_SLOW_CONSUMER_POLICY", "disconnect")
+# 이 시간(초) 동안 메시지 POST도 이벤트 전송도 없는 세션은 종료 (0이면 비활성)
+SSE_IDLE_TIMEOUT = float(os.getenv("SSE_IDLE_TIMEOUT", "900"))
+# keepalive 주석(": ping") 전송 주기(초) - APIM/LB 유휴 타임아웃보다 짧게, 끊긴 연결도 빨리 감지
+SSE_KEEPALIVE_INTERVAL = float(os.getenv("SSE_KEEPALIVE_INTERVAL", "15"))
+
+# 종료 시 남은 이벤트를 내보내기 위해 기다리는 최대 시간(초)
+FLUSH_TIMEOUT = 5.0
+
+# MCP SSE 응답의 keepalive 주기 설정 (0이면 보내지 않음)
+# 응답 객체는 mcp.server.sse가 직접 만들므로, 클래스 기본값을 바꾸지 않고 그 모듈이 쓰는 생성자에만
+# ping=을 지정 (프로세스의 다른 EventSourceResponse에는 영향 없음)
+mcp_sse.EventSourceResponse = functools.partial(EventSourceResponse, ping=SSE_KEEPALIVE_INTERVAL)
+
+DISCONNECT = {"type": "http.disconnect"}
+
+
+class SseSession:
+    """One SSE connection: a bounded outbound buffer drained to the client by a writer task."""
+
+    def __init__(self, guard: "SseGuard", send, receive):
+        self.guard = guard
+        self.session_id: str | None = None
+        self._send = send
+        self._receive = receive
+        self._buffer: deque[dict[str, Any]] = deque()
+        self.buffered = 0
+        self._ready = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.last_activity = time.monotonic()
+        self._writer: asyncio.Task | None = None
+        self._final_queued = False
+
+    def touch(self) -> None:
+        self.last_activity = time.monotonic()
+
+    async def send(self, message: dict[str, Any]) -> None:
+        """ASGI send for the MCP SSE response; never waits on the client socket."""
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            self._writer = asyncio.create_task(self._write())
+            return
+        if self.closed.is_set():
+            return
+        body = message.get("body", b"")
+        final = not message.get("more_body", False)
+        # ':'로 시작하는 keepalive 주석은 활동으로 보지 않음
+        keepalive = body.startswith(b":")
+        if not keepalive:
+            self.touch()
+        # 버퍼가 비어 있으면 큰 이벤트도 하나는 허용 (큰 도구 결과가 항상 버려지지 않도록)
+        if not final and self._buffer and self.buffered + len(body) > self.guard.max_buffer_bytes:
+            if keepalive:
+                return
+            if self.guard.policy == "drop":
+                self.guard.dropped_total.inc()
+                return
+            self.close("slow_consumer")
+            return
+        self._enqueue(message)
+
+    def _enqueue(self, message: dict[str, Any]) -> None:
+        self._buffer.append(message)
+        self.buffered += len(message.get("body", b""))
+        if not message.get("more_body", False):
+            self._final_queued = True
+        self._ready.set()
+
+    async def _write(self) -> None:
+        try:
+            while True:
+                await self._ready.wait()
+                while self._buffer:
+                    message = self._buffer.popleft()
+                    self.buffered -= len(message.get("body", b""))
+                    await self._send(message)
+                    if not message.get("more_body", False):
+                        return
+                self._ready.clear()
+        except OSError:
+            # 클라이언트 소켓 오류: 응답 쪽에도 연결 종료로 알림
+            self.closed.set()
+
+    async def receive(self) -> dict[str, Any]:
+        """ASGI receive that also reports a disconnect once the session is closed by the guard."""
+        if self.closed.is_set():
+            return DISCONNECT
+        received = asyncio.ensure_future(self._receive())
+        closed = asyncio.ensure_future(self.closed.wait())
+        try:
+            await asyncio.wait((received, closed), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            closed.cancel()
+            if not received.done():
+                received.cancel()
+        if received.done() and not received.cancelled():
+            message = received.result()
+            if message["type"] == "http.disconnect":
+                self.closed.set()
+            return message
+        return DISCONNECT
+
+    def close(self, reason: str) -> None:
+        """End the session: the response sees a disconnect and the writer stops."""
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self.guard.evicted_total.inc(reason)
+        if reason == "slow_consumer":
+            # 소켓 전송이 막혀 있으므로 남은 이벤트를 버리고 연결을 끊음
+            if self._writer is not None:
+                self._writer.cancel()
+            self._buffer.clear()
+            self.buffered = 0
+        elif self._writer is not None:
+            # 남은 이벤트를 보낸 뒤 스트림을 정상 종료
+            self._enqueue({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def finish(self) -> None:
+        """Give the writer a moment to flush the end of the stream, then stop it."""
+        if self._writer is None:
+            return
+        if self._final_queued:
+            await asyncio.wait((self._writer,), timeout=FLUSH_TIMEOUT)
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+
+
+class SseGuard:
+    """Admission limit, per-session buffers and idle eviction for the SSE sessions of one process."""
+
+    def __init__(self, max_sessions: int = SSE_MAX_SESSIONS, max_buffer_bytes: int = SSE_MAX_BUFFER_BYTES,
+                 policy: str = SSE_SLOW_CONSUMER_POLICY, idle_timeout: float = SSE_IDLE_TIMEOUT):
+        if policy not in ("drop", "disconnect"):
+            raise ValueError(f"SSE_SLOW_CONSUMER_POLICY must be drop or disconnect, not {policy!r}")
+        self.max_sessions = max_sessions
+        self.max_buffer_bytes = max_buffer_bytes
+        self.policy = policy
+        self.idle_timeout = idle_timeout
+        self.sessions: set[SseSession] = set()
+        self._by_id: dict[str, SseSession] = {}
+        self._task: asyncio.Task | None = None
+        self.rejected_total = metrics.registry.counter(
+            "mcp_sse_rejected_total", "SSE connections refused because SSE_MAX_SESSIONS was reached.")
+        self.evicted_total = metrics.registry.counter(
+            "mcp_sse_evicted_total", "SSE sessions closed by the server.", ("reason",))
+        self.dropped_total = metrics.registry.counter(
+            "mcp_sse_dropped_events_total", "SSE events dropped because the session buffer was full.")
+        metrics.registry.callback("mcp_sse_buffered_bytes", "Bytes waiting in SSE session buffers.",
+                                  lambda: sum(session.buffered for session in self.sessions))
+
+    def admit(self) -> bool:
+        if self.max_sessions > 0 and len(self.sessions) >= self.max_sessions:
+            self.rejected_total.inc()
+            return False
+        return True
+
+    def open(self, send, receive) -> SseSession:
+        session = SseSession(self, send, receive)
+        self.sessions.add(session)
+        return session
+
+    def identify(self, session: SseSession, session_id: str) -> None:
+        session.session_id = session_id
+        self._by_id[session_id] = session
+
+    def touch(self, session_id: str) -> None:
+        """Record client activity (a /messages/ POST) for ``session_id``."""
+        session = self._by_id.get(session_id)
+        if session is not None:
+            session.touch()
+
+    async def release(self, session: SseSession) -> None:
+        self.sessions.discard(session)
+        if session.session_id is not None:
+            self._by_id.pop(session.session_id, None)
+        await session.finish()
+
+    async def _sweep(self) -> None:
+        interval = max(1.0, min(self.idle_timeout / 4, 30.0))
+        while True:
+            await asyncio.sleep(interval)
+            deadline = time.monotonic() - self.idle_timeout
+            for session in list(self.sessions):
+                if session.last_activity < deadline:
+                    session.close("idle")
+
+    def start(self) -> None:
+        if self.idle_timeout > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._sweep())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,26 @@
+# 시간별 예보에 기온이 빠진 시간이 있어도 일별 최저/최고/평균이 왜곡되지 않는지 확인
+from hourly_summary import HourlySeries, summarize_hourly
+
+
+def period(hour, temperature, day=1):
+    return {"startTime": f"2024-07-0{day}T{hour:02d}:00:00-07:00", "temperature": temperature,
+            "temperatureUnit": "F", "windSpeed": "5 mph", "shortForecast": "Sunny",
+            "probabilityOfPrecipitation": {"value": 10}}
+
+
+def test_missing_temperature_is_skipped():
+    periods = [period(0, 60), period(1, None), period(2, 70)]
+    periods[1].pop("temperature")
+    periods.append(period(3, None))
+    day = HourlySeries(periods).daily()[0]
+    assert day["min_temp"] == 60
+    assert day["max_temp"] == 70
+    assert day["mean_temp"] == 65
+
+
+def test_day_without_temperatures_reports_not_available():
+    periods = [period(22, 55), period(23, 53), period(0, None, day=2), period(1, None, day=2)]
+    summary = summarize_hourly(periods, days=2)
+    assert "53-55°F" in summary
+    assert "temperature n/a" in summary
+    assert "0-" not in summary
@@ -0,0 +1,55 @@
+# 업스트림 실패 결과가 도구 캐시에 저장되어 재사용되지 않는지 확인
+import asyncio
+from autogen_core.tools import TextResultContent, ToolResult
+from mcp.shared.memory import create_connected_server_and_client_session
+import weather_sse
+from tool_cache import CachingWorkbench, ToolResultCache
+
+
+class FakeWorkbench:
+    """Workbench stand-in returning the queued results in order and counting calls."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def call_tool(self, name, arguments=None, cancellation_token=None, call_id=None):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+def tool_result(text, is_error=False):
+    return ToolResult(name="get_forecast", result=[TextResultContent(content=text)], is_error=is_error)
+
+
+def test_failed_call_is_not_replayed():
+    upstream = FakeWorkbench([tool_result("Unable to fetch forecast.", is_error=True), tool_result("Tonight: Clear")])
+    workbench = CachingWorkbench(upstream, ToolResultCache(maxsize=16, ttls={"get_forecast": 600.0}))
+    arguments = {"latitude": 37.77, "longitude": -122.42}
+
+    async def run():
+        first = await workbench.call_tool("get_forecast", arguments)
+        second = await workbench.call_tool("get_forecast", arguments)
+        third = await workbench.call_tool("get_forecast", arguments)
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first.is_error
+    assert not second.is_error and second.result[0].content == "Tonight: Clear"
+    # 실패는 다시 호출하고, 성공한 결과만 캐시에서 응답
+    assert third is second
+    assert upstream.calls == 2
+
+
+def test_server_reports_upstream_failure_as_tool_error(monkeypatch):
+    async def no_gridpoint(latitude, longitude):
+        return None
+
+    monkeypatch.setattr(weather_sse, "resolve_gridpoint", no_gridpoint)
+
+    async def run():
+        async with create_connected_server_and_client_session(weather_sse.mcp._mcp_server) as session:
+            return await session.call_tool("get_forecast", {"latitude": 37.77, "longitude": -122.42})
+
+    result = asyncio.run(run())
+    assert result.isError
@@ -0,0 +1,231 @@
+# 에이전트가 같은 인자로 반복 호출하는 MCP 도구 결과를 재사용하는 클라이언트 측 캐시
+#
+# AssistantAgent는 한 대화 안에서도, 배치로 돌리는 여러 대화 사이에서도 get_alerts/get_forecast를 같은
+# 인자로 다시 호출하며, 매번 MCP 왕복과 NWS 조회 비용을 치릅니다. ToolResultCache는 도구 이름과 정규화한
+# 인자를 키로 결과를 도구별 TTL 동안 보관하고(LRU, 최대 개수 제한), 같은 호출이 동시에 들어오면 한 번만
+# 실행합니다. CachingWorkbench(워크벤치용)와 CachingTool(어댑터용)이 에이전트 모르게 캐시를 끼워 넣습니다.
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, Mapping
+import json
+import os
+import time
+from autogen_core import CancellationToken
+from autogen_core.tools import BaseTool, ToolResult, ToolSchema, Workbench
+from pydantic import BaseModel
+from singleflight import SingleFlight
+
+# 캐시할 최대 결과 수 (0이면 캐시하지 않음)
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "256"))
+# 도구별 TTL이 없는 도구의 결과 보관 시간(초)
+TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "300"))
+# 도구별 TTL(초), 예: "get_alerts=30,get_forecast=900" - 0이면 해당 도구는 캐시하지 않음
+TOOL_CACHE_TTLS = os.getenv("TOOL_CACHE_TTLS", "")
+
+# 기본 도구별 TTL: 경보는 수시로 바뀌고, 예보는 NWS가 대략 한 시간마다 갱신
+DEFAULT_TOOL_TTLS = {
+    "get_alerts": 60.0,
+    "get_alerts_for_states": 60.0,
+    "get_forecast": 600.0,
+    "get_forecasts": 600.0,
+    "get_hourly_summary": 600.0,
+}
+
+# 값이 참이면 캐시하지 않는 인자 - 결과 문자열이 아니라 호출 중 보내는 알림(예: get_alerts의
+# stream=true 진행 알림)이 실제 응답이므로, 캐시에서 돌려주면 아무것도 스트리밍되지 않음
+UNCACHED_ARGUMENTS = ("stream",)
+
+
+def parse_ttls(value: str) -> dict[str, float]:
+    """Parse ``"name=seconds,name=seconds"`` into a per-tool TTL mapping."""
+    ttls = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, sep, seconds = item.partition("=")
+        if not sep:
+            raise ValueError(f"TOOL_CACHE_TTLS entries must look like name=seconds, not {item!r}")
+        ttls[name.strip()] = float(seconds)
+    return ttls
+
+
+def _normalize(value: Any) -> Any:
+    # 인자 순서, 값이 None인 인자, 37.0과 37 같은 숫자 표기 차이가 다른 키가 되지 않도록 정리
+    if isinstance(value, Mapping):
+        return {str(k): _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class ToolResultCache:
+    """LRU + per-tool TTL cache of tool results keyed by tool name and normalized arguments.
+
+    A tool whose TTL is 0 is never cached, nor is a call that sets one of
+    ``UNCACHED_ARGUMENTS`` (e.g. ``stream=true``). Concurrent misses for the
+    same key share one call.
+    """
+
+    def __init__(self, maxsize: int = TOOL_CACHE_SIZE, ttl: float = TOOL_CACHE_TTL,
+                 ttls: Mapping[str, float] | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = {**DEFAULT_TOOL_TTLS, **parse_ttls(TOOL_CACHE_TTLS)} if ttls is None else dict(ttls)
+        # key -> (expires_at, value); 프로세스 안에서만 쓰므로 monotonic clock 사용
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._tools: dict[str, dict[str, int]] = {}
+        # 도구 스키마의 인자 기본값 - 생략한 인자와 기본값을 직접 준 인자가 같은 키가 되도록 채움
+        self._defaults: dict[str, dict[str, Any]] = {}
+
+    def learn(self, schemas: List[ToolSchema]) -> None:
+        """Record the argument defaults declared in tool schemas."""
+        for schema in schemas:
+            properties = schema.get("parameters", {}).get("properties", {})
+            self._defaults[schema["name"]] = {
+                name: prop["default"] for name, prop in properties.items() if "default" in prop}
+
+    def ttl_for(self, name: str) -> float:
+        return self.ttls.get(name, self.ttl)
+
+    def cacheable(self, name: str, arguments: Mapping[str, Any] | None = None) -> bool:
+        if arguments and any(arguments.get(flag) for flag in UNCACHED_ARGUMENTS):
+            return False
+        return self.maxsize > 0 and self.ttl_for(name) > 0
+
+    def key(self, name: str, arguments: Mapping[str, Any] | None) -> str:
+        arguments = {**self._defaults.get(name, {}), **(arguments or {})}
+        normalized = json.dumps(_normalize(arguments), sort_keys=True, separators=(",", ":"), default=str)
+        return f"{name}:{normalized}"
+
+    def _count(self, name: str, field: str) -> None:
+        counters = self._tools.setdefault(name, {"hits": 0, "misses": 0})
+        counters[field] += 1
+        if field == "hits":
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def get(self, name: str, arguments: Mapping[str, Any] | None) -> Any | None:
+        """Return the cached result for a call, or None."""
+        key = self.key(name, arguments)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._count(name, "misses")
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self._count(name, "misses")
+            return None
+        self._entries.move_to_end(key)
+        self._count(name, "hits")
+        return value
+
+    def put(self, name: str, arguments: Mapping[str, Any] | None, value: Any) -> None:
+        """Store a result, evicting the least recently used entries."""
+        if not self.cacheable(name, arguments):
+            return
+        key = self.key(name, arguments)
+        self._entries[key] = (time.monotonic() + self.ttl_for(name), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def call(self, name: str, arguments: Mapping[str, Any] | None, fn: Callable[[], Awaitable[Any]],
+                   store: Callable[[Any], bool] = lambda result: True) -> Any:
+        """Return the cached result or run ``fn``; results for which ``store`` is False are not kept."""
+        if not self.cacheable(name, arguments):
+            return await fn()
+        cached = self.get(name, arguments)
+        if cached is not None:
+            return cached
+
+        async def run() -> Any:
+            result = await fn()
+            if store(result):
+                self.put(name, arguments, result)
+            return result
+
+        return await self._flight.do(self.key(name, arguments), run)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss/eviction counters, the current size and per-tool hits and misses."""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "coalesced": self._flight.coalesced,
+            "tools": {name: dict(counters) for name, counters in self._tools.items()},
+        }
+
+
+class CachingWorkbench(Workbench):
+    """Workbench wrapper answering repeated tool calls from a ToolResultCache; error results are not cached."""
+
+    def __init__(self, workbench: Workbench, cache: ToolResultCache):
+        self.workbench = workbench
+        self.cache = cache
+
+    async def list_tools(self) -> List[ToolSchema]:
+        tools = await self.workbench.list_tools()
+        self.cache.learn(tools)
+        return tools
+
+    async def call_tool(self, name: str, arguments: Mapping[str, Any] | None = None,
+                        cancellation_token: CancellationToken | None = None, call_id: str | None = None) -> ToolResult:
+        return await self.cache.call(
+            name, arguments, lambda: self.workbench.call_tool(name, arguments, cancellation_token, call_id),
+            store=lambda result: not result.is_error)
+
+    async def start(self) -> None:
+        await self.workbench.start()
+
+    async def stop(self) -> None:
+        await self.workbench.stop()
+
+    async def reset(self) -> None:
+        self.cache.clear()
+        await self.workbench.reset()
+
+    async def save_state(self) -> Mapping[str, Any]:
+        return await self.workbench.save_state()
+
+    async def load_state(self, state: Mapping[str, Any]) -> None:
+        await self.workbench.load_state(state)
+
+
+class CachingTool(BaseTool[BaseModel, Any]):
+    """Tool wrapper (e.g. around an SseMcpToolAdapter) answering repeated calls from a ToolResultCache.
+
+    A call that raises, as an MCP tool error does, is not cached.
+    """
+
+    def __init__(self, tool: BaseTool[BaseModel, Any], cache: ToolResultCache):
+        super().__init__(tool.args_type(), tool.return_type(), tool.name, tool.description)
+        self.tool = tool
+        self.cache = cache
+        cache.learn([tool.schema])
+
+    @property
+    def schema(self) -> ToolSchema:
+        return self.tool.schema
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        return await self.cache.call(self.name, args.model_dump(exclude_unset=True),
+                                     lambda: self.tool.run(args, cancellation_token))
+
+    def return_value_as_string(self, value: Any) -> str:
+        return self.tool.return_value_as_string(value)
@@ -1,27 +1,18 @@
-from typing import Any
-import httpx
-from mcp.server.fastmcp import FastMCP
+from functools import partial
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+import nws_client
+from alerts_index import can_stream, page_alerts, stream_alerts
+from hourly_summary import summarize_hourly
+from nws_client import (
+    ALERTS_PAGE_SIZE, BATCH_MAX_LOCATIONS, make_nws_request, resolve_gridpoint, fetch_forecasts,
+    indexed_alerts, fetch_alerts_for_states, alerts_url,
+)
 
 # Initialize FastMCP server
-mcp = FastMCP("weather")
-
-# Constants
-NWS_API_BASE = "https://api.weather.gov"
-USER_AGENT = "weather-app/1.0"
-
-async def make_nws_request(url: str) -> dict[str, Any] | None:
-    """Make a request to the NWS API with proper error handling."""
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "application/geo+json"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception:
-            return None
+# (stdio runs a single session, so the server lifespan owns the pooled NWS client;
+#  the client is created on the first tool call so it stays off the spawn -> list_tools path)
+mcp = FastMCP("weather", lifespan=partial(nws_client.lifespan, eager_client=False))
 
 def format_alert(feature: dict) -> str:
     """Format an alert feature into a readable string."""
@@ -34,24 +25,80 @@ def format_alert(feature: dict) -> str:
         f"Instructions: {props.get('instruction', 'No specific instructions provided')}\n"
     )
 
+def format_periods(periods: list[dict]) -> str:
+    """Format the next forecast periods into a readable string."""
+    forecasts = []
+    for period in periods[:5]:  # Only show next 5 periods
+        forecast = (
+            f"{period['name']}:\n"
+            f"Temperature: {period['temperature']}°{period['temperatureUnit']}\n"
+            f"Wind: {period['windSpeed']} {period['windDirection']}\n"
+            f"Forecast: {period['detailedForecast']}\n"
+        )
+        forecasts.append(forecast)
+    return "\n---\n".join(forecasts)
+
 @mcp.tool()
-async def get_alerts(state: str) -> str:
+async def get_alerts(state: str, limit: int = ALERTS_PAGE_SIZE, cursor: str | None = None,
+                     stream: bool = False, ctx: Context | None = None) -> str:
     """Get weather alerts for a US state.
 
     Args:
         state: Two-letter US state code (e.g. CA, NY)
+        limit: Maximum number of alerts to return in one page
+        cursor: "Next cursor" value from a previous call, to fetch the following page
+        stream: Send each alert as an MCP progress notification instead of one large result
     """
-    url = f"{NWS_API_BASE}/alerts/active/area/{state}"
-    data = await make_nws_request(url)
+    # Served from the background alerts index when it is enabled and fresh
+    features = indexed_alerts(states=[state])
+    if features is None:
+        url = alerts_url(state)
+        data = await make_nws_request(url)
+
+        # Upstream failures are raised so the result is flagged isError (and never cached client-side)
+        if not data or "features" not in data:
+            raise ToolError("Unable to fetch alerts.")
+        features = data["features"]
+
+    if not features:
+        return "No active alerts for this state."
 
-    if not data or "features" not in data:
-        return "Unable to fetch alerts or no alerts found."
+    if stream and can_stream(ctx):
+        count = await stream_alerts(ctx, features, format_alert)
+        return f"Streamed {count} alerts as progress notifications."
 
-    if not data["features"]:
-        return "No active alerts for this state."
+    try:
+        page, next_cursor = page_alerts(features, limit, cursor)
+    except ValueError:
+        return "Invalid cursor or limit."
 
-    alerts = [format_alert(feature) for feature in data["features"]]
-    return "\n---\n".join(alerts)
+    alerts = [format_alert(feature) for feature in page]
+    result = "\n---\n".join(alerts)
+    if next_cursor:
+        result += f"\n\nShowing {len(page)} of {len(features)} alerts. Next cursor: {next_cursor}"
+    return result
+
+@mcp.tool()
+async def get_alerts_for_states(states: list[str], severities: list[str] | None = None) -> str:
+    """Get weather alerts for several US states at once.
+
+    Args:
+        states: Two-letter US state codes (e.g. ["CA", "NV"])
+        severities: Optional severity filter (Extreme, Severe, Moderate, Minor)
+    """
+    by_state = await fetch_alerts_for_states(states, severities)
+
+    if by_state is None:
+        raise ToolError("Unable to fetch alerts.")
+
+    sections = []
+    for state, features in by_state.items():
+        if features:
+            body = "\n---\n".join(format_alert(feature) for feature in features)
+        else:
+            body = "No active alerts for this state."
+        sections.append(f"=== {state} ===\n{body}")
+    return "\n\n".join(sections)
 
 @mcp.tool()
 async def get_forecast(latitude: float, longitude: float) -> str:
@@ -61,33 +108,69 @@ async def get_forecast(latitude: float, longitude: float) -> str:
         latitude: Latitude of the location
         longitude: Longitude of the location
     """
-    # First get the forecast grid endpoint
-    points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
-    points_data = await make_nws_request(points_url)
+    # First get the forecast grid endpoint (cached per grid cell)
+    gridpoint = await resolve_gridpoint(latitude, longitude)
 
-    if not points_data:
-        return "Unable to fetch forecast data for this location."
+    if not gridpoint:
+        raise ToolError("Unable to fetch forecast data for this location.")
 
     # Get the forecast URL from the points response
-    forecast_url = points_data["properties"]["forecast"]
+    forecast_url = gridpoint["forecast"]
     forecast_data = await make_nws_request(forecast_url)
 
     if not forecast_data:
-        return "Unable to fetch detailed forecast."
+        raise ToolError("Unable to fetch detailed forecast.")
 
     # Format the periods into a readable forecast
-    periods = forecast_data["properties"]["periods"]
-    forecasts = []
-    for period in periods[:5]:  # Only show next 5 periods
-        forecast = (
-            f"{period['name']}:\n"
-            f"Temperature: {period['temperature']}°{period['temperatureUnit']}\n"
-            f"Wind: {period['windSpeed']} {period['windDirection']}\n"
-            f"Forecast: {period['detailedForecast']}\n"
-        )
-        forecasts.append(forecast)
+    return format_periods(forecast_data["properties"]["periods"])
 
-    return "\n---\n".join(forecasts)
+@mcp.tool()
+async def get_hourly_summary(latitude: float, longitude: float, days: int = 7,
+                             precip_threshold: int = 50) -> str:
+    """Get a compact daily summary of the hourly forecast for a location.
+
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        days: Number of days to summarize (max 7)
+        precip_threshold: Precipitation chance (%) at which hours are reported as wet
+    """
+    gridpoint = await resolve_gridpoint(latitude, longitude)
+
+    if not gridpoint or not gridpoint.get("forecastHourly"):
+        raise ToolError("Unable to fetch forecast data for this location.")
+
+    forecast_data = await make_nws_request(gridpoint["forecastHourly"])
+
+    if not forecast_data or not forecast_data.get("properties", {}).get("periods"):
+        raise ToolError("Unable to fetch hourly forecast.")
+
+    return summarize_hourly(forecast_data["properties"]["periods"], days, precip_threshold)
+
+@mcp.tool()
+async def get_forecasts(locations: list[tuple[float, float]]) -> str:
+    """Get weather forecasts for several locations in one call.
+
+    Args:
+        locations: List of [latitude, longitude] pairs
+    """
+    if len(locations) > BATCH_MAX_LOCATIONS:
+        return f"Too many locations; at most {BATCH_MAX_LOCATIONS} per call."
+
+    sections = []
+    results = await fetch_forecasts(locations)
+    for result in results:
+        header = f"=== {result['latitude']}, {result['longitude']} ===\n"
+        if result["error"] == "points":
+            sections.append(header + "Unable to fetch forecast data for this location.")
+        elif result["error"]:
+            sections.append(header + "Unable to fetch detailed forecast.")
+        else:
+            sections.append(header + format_periods(result["periods"]))
+    # If any location failed, return everything as an error so the partial result is not cached
+    if any(result["error"] for result in results):
+        raise ToolError("\n\n".join(sections))
+    return "\n\n".join(sections)
 
 if __name__ == "__main__":
     # Initialize and run the server
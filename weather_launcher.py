@@ -0,0 +1,206 @@
+# 미리 import를 끝낸 부모 프로세스에서 stdio 날씨 서버를 fork해 주는 런처 (Linux/macOS)
+#
+# weather.py를 새로 실행하면 대부분의 시간이 mcp 패키지(pydantic 모델, starlette, uvicorn 등) import에
+# 쓰입니다. serve 모드는 weather.py와 NWS 클라이언트를 한 번만 준비해 두고 Unix 소켓에서 기다립니다.
+# MCP 클라이언트는 weather.py 대신 가벼운 connect 스텁(python -S)을 실행하고, 스텁이 자신의
+# stdin/stdout/stderr를 소켓으로 넘기면 런처가 fork한 자식이 그 파이프로 MCP stdio 서버를 실행합니다.
+# 스텁은 자식이 끝날 때까지 기다렸다가 같은 종료 코드로 끝나고, 스텁이 먼저 종료되면 자식도 종료됩니다.
+#
+#   python weather_launcher.py serve &                 # 런처 시작
+#   python -S weather_launcher.py connect              # weather.py 대신 MCP 클라이언트가 실행할 명령
+#
+# 자식 서버의 환경 변수와 작업 디렉터리는 스텁이 아니라 런처 프로세스의 것을 따릅니다.
+# 런처가 실행 중이 아니면 스텁은 weather.py를 직접 실행합니다.
+import argparse
+import os
+import selectors
+import signal
+import socket
+import sys
+
+# 런처가 기다리는 Unix 소켓 경로
+WEATHER_LAUNCHER_SOCKET = os.getenv(
+    "WEATHER_LAUNCHER_SOCKET", os.path.join("/tmp", f"weather-mcp-{os.getuid()}.sock"))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def launcher_params(socket_path: str = WEATHER_LAUNCHER_SOCKET, **kwargs):
+    """StdioServerParams that start the weather server through the launcher's connect stub."""
+    from autogen_ext.tools.mcp import StdioServerParams
+
+    return StdioServerParams(
+        command=sys.executable,
+        args=["-S", os.path.join(HERE, "weather_launcher.py"), "connect", "--socket", socket_path],
+        **kwargs,
+    )
+
+
+def _warm() -> None:
+    # fork 전에 비싼 준비를 끝내 두면 모든 자식이 복사본을 그대로 사용
+    import nws_client
+    import weather  # noqa: F401
+
+    nws_client.gridpoints.load()
+    nws_client.get_client()
+
+
+def _run_child(fds: list[int]) -> None:
+    for signum in (signal.SIGCHLD, signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    signal.set_wakeup_fd(-1)
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    # 부모의 sys.stdin/stdout은 부모 시작 시점의 파일(예: 로그 파일) 기준으로 만들어졌으므로 새로 생성
+    sys.stdin = open(0, "r", closefd=False)
+    sys.stdout = open(1, "w", closefd=False)
+    sys.stderr = open(2, "w", buffering=1, closefd=False)
+    code = 0
+    try:
+        import weather
+
+        weather.mcp.run(transport="stdio")
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+        code = 1
+    finally:
+        # 부모에서 물려받은 atexit 처리기/소켓 정리를 실행하지 않고 종료 (stdout은 MCP 서버가 이미 닫았을 수 있음)
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+        os._exit(code)
+
+
+def serve(socket_path: str = WEATHER_LAUNCHER_SOCKET) -> None:
+    """Import the weather server once, then fork one server per connecting stub."""
+    _warm()
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(128)
+
+    # SIGCHLD/SIGTERM을 selector로 받기 위한 wakeup 파이프
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    stopping = False
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, "accept")
+    selector.register(wakeup_r, selectors.EVENT_READ, "signal")
+    children: dict[int, socket.socket] = {}
+    print(f"[weather_launcher] ready on {socket_path} (pid {os.getpid()})", file=sys.stderr, flush=True)
+
+    def reap() -> None:
+        while children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            conn = children.pop(pid, None)
+            if conn is None:
+                continue
+            try:
+                selector.unregister(conn)
+            except KeyError:
+                pass
+            try:
+                conn.sendall(str(os.waitstatus_to_exitcode(status)).encode())
+            except OSError:
+                pass
+            conn.close()
+
+    try:
+        while not stopping:
+            for key, _ in selector.select():
+                if key.data == "accept":
+                    conn, _ = listener.accept()
+                    try:
+                        _, fds, _, _ = socket.recv_fds(conn, 16, 3)
+                    except OSError:
+                        conn.close()
+                        continue
+                    if len(fds) != 3:
+                        for fd in fds:
+                            os.close(fd)
+                        conn.close()
+                        continue
+                    pid = os.fork()
+                    if pid == 0:
+                        selector.close()
+                        listener.close()
+                        conn.close()
+                        _run_child(fds)
+                    for fd in fds:
+                        os.close(fd)
+                    children[pid] = conn
+                    selector.register(conn, selectors.EVENT_READ, pid)
+                elif key.data == "signal":
+                    try:
+                        os.read(wakeup_r, 512)
+                    except BlockingIOError:
+                        pass
+                    reap()
+                else:
+                    # 스텁 연결이 끊김 (MCP 클라이언트가 스텁을 종료) -> 자식 서버도 종료
+                    if not key.fileobj.recv(1):
+                        selector.unregister(key.fileobj)
+                        try:
+                            os.kill(key.data, signal.SIGTERM)
+                        except ProcessLookupError:
+                            pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def connect(socket_path: str = WEATHER_LAUNCHER_SOCKET) -> None:
+    """Hand this process's stdio to a forked server and exit with its status."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        # 런처가 없으면 서버를 직접 실행 (느리지만 동작은 같음)
+        os.execv(sys.executable, [sys.executable, os.path.join(HERE, "weather.py")])
+    socket.send_fds(sock, [b"run"], [0, 1, 2])
+    # 파이프는 자식만 잡고 있도록 스텁 쪽은 닫음 (클라이언트가 자식 종료를 EOF로 알 수 있게)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    status = sock.recv(16)
+    sys.exit(int(status) if status else 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fork prewarmed stdio weather MCP servers")
+    parser.add_argument("mode", choices=("serve", "connect"))
+    parser.add_argument("--socket", default=WEATHER_LAUNCHER_SOCKET, help="Unix socket path")
+    args = parser.parse_args()
+    if args.mode == "serve":
+        serve(args.socket)
+    else:
+        connect(args.socket)
+
+
+if __name__ == "__main__":
+    main()
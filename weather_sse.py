@@ -1,29 +1,20 @@
 # MCP 기반 서버로 리팩토링
-from typing import Any
-import httpx
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
 import json
 import asyncio
+import os
+import nws_client
+from alerts_index import can_stream, page_alerts, stream_alerts
+from hourly_summary import summarize_hourly
+from nws_client import (
+    ALERTS_PAGE_SIZE, BATCH_MAX_LOCATIONS, make_nws_request, resolve_gridpoint, fetch_forecasts,
+    indexed_alerts, fetch_alerts_for_states, alerts_url,
+)
 
 # FastMCP 인스턴스 생성
 mcp = FastMCP("weather-mcp-server")
 
-NWS_API_BASE = "https://api.weather.gov"
-USER_AGENT = "weather-app/1.0"
-
-async def make_nws_request(url: str) -> dict[str, Any] | None:
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "application/geo+json"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception:
-            return None
-
 def format_alert(feature: dict) -> str:
     props = feature["properties"]
     return (
@@ -35,42 +26,122 @@ def format_alert(feature: dict) -> str:
     )
 
 
+def format_periods(periods: list[dict]) -> str:
+    return "\n".join(f"{p['name']}: {p['detailedForecast']}" for p in periods)
+
+
 # MCP 도구로 등록
 @mcp.tool()
-async def get_alerts(state: str) -> str:
-    """Get weather alerts for a US state."""
-    url = f"{NWS_API_BASE}/alerts/active?area={state.upper()}"
-    data = await make_nws_request(url)
-    if not data or "features" not in data:
+async def get_alerts(state: str, limit: int = ALERTS_PAGE_SIZE, cursor: str | None = None,
+                     stream: bool = False, ctx: Context | None = None) -> str:
+    """Get weather alerts for a US state.
+
+    Returns at most `limit` alerts; pass the returned "Next cursor" to get the next page.
+    With `stream=true`, alerts are sent one by one as MCP progress notifications.
+    """
+    # 백그라운드 특보 인덱스가 켜져 있으면 업스트림 호출 없이 응답
+    features = indexed_alerts(states=[state.upper()])
+    if features is None:
+        url = alerts_url(state)
+        data = await make_nws_request(url)
+        # 업스트림 실패는 예외로 알려 isError 결과가 되게 함 (클라이언트 도구 캐시에 저장되지 않음)
+        if not data or "features" not in data:
+            raise ToolError("Unable to fetch alerts.")
+        features = data["features"]
+    if not features:
         return "No alerts found."
-    alerts = [format_alert(f) for f in data["features"]]
-    return "\n---\n".join(alerts) if alerts else "No alerts found."
+    # 스트리밍 요청 시 특보를 하나씩 progress 알림으로 전송 (SSE로 먼저 도착)
+    if stream and can_stream(ctx):
+        count = await stream_alerts(ctx, features, format_alert)
+        return f"Streamed {count} alerts."
+    try:
+        page, next_cursor = page_alerts(features, limit, cursor)
+    except ValueError:
+        return "Invalid cursor or limit."
+    result = "\n---\n".join(format_alert(f) for f in page)
+    if next_cursor:
+        result += f"\n\n({len(page)}/{len(features)} alerts) Next cursor: {next_cursor}"
+    return result
+
+
+@mcp.tool()
+async def get_alerts_for_states(states: list[str], severities: list[str] | None = None) -> str:
+    """Get weather alerts for several US states, optionally filtered by severity."""
+    by_state = await fetch_alerts_for_states(states, severities)
+    if by_state is None:
+        raise ToolError("Unable to fetch alerts.")
+    sections = []
+    for state, features in by_state.items():
+        body = "\n---\n".join(format_alert(f) for f in features) if features else "No alerts found."
+        sections.append(f"[{state}]\n{body}")
+    return "\n\n".join(sections)
 
 
 @mcp.tool()
 async def get_forecast(latitude: float, longitude: float) -> str:
     """Get weather forecast for a given latitude and longitude."""
-    # 1. 포인트 정보 조회
-    points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
-    points_data = await make_nws_request(points_url)
-    if not points_data or "properties" not in points_data or "forecast" not in points_data["properties"]:
-        return "No forecast found."
-    forecast_url = points_data["properties"]["forecast"]
+    # 1. 포인트 정보 조회 (격자 단위 캐시)
+    gridpoint = await resolve_gridpoint(latitude, longitude)
+    if not gridpoint:
+        raise ToolError("Unable to fetch forecast data for this location.")
+    forecast_url = gridpoint["forecast"]
     # 2. 예보 정보 조회
     data = await make_nws_request(forecast_url)
     if not data or "properties" not in data:
-        return "No forecast found."
+        raise ToolError("Unable to fetch forecast.")
     periods = data["properties"].get("periods", [])
     if not periods:
         return "No forecast found."
-    forecast = [f"{p['name']}: {p['detailedForecast']}" for p in periods]
-    return "\n".join(forecast)
+    return format_periods(periods)
+
+
+@mcp.tool()
+async def get_hourly_summary(latitude: float, longitude: float, days: int = 7,
+                             precip_threshold: int = 50) -> str:
+    """Get a daily summary (temperature range, wind, precipitation windows) of the hourly forecast."""
+    gridpoint = await resolve_gridpoint(latitude, longitude)
+    if not gridpoint or not gridpoint.get("forecastHourly"):
+        raise ToolError("Unable to fetch forecast data for this location.")
+    # 156시간 분량을 그대로 반환하지 않고 배열 기반으로 집계한 요약만 반환
+    data = await make_nws_request(gridpoint["forecastHourly"])
+    if not data or not data.get("properties", {}).get("periods"):
+        raise ToolError("Unable to fetch hourly forecast.")
+    return summarize_hourly(data["properties"]["periods"], days, precip_threshold)
+
+
+@mcp.tool()
+async def get_forecasts(locations: list[tuple[float, float]]) -> str:
+    """Get weather forecasts for several [latitude, longitude] pairs in one call."""
+    if len(locations) > BATCH_MAX_LOCATIONS:
+        return f"Too many locations (max {BATCH_MAX_LOCATIONS})."
+    # 격자 조회와 예보 조회를 제한된 동시성으로 병렬 처리 (실패한 위치만 개별 표시)
+    sections = []
+    results = await fetch_forecasts(locations)
+    for result in results:
+        body = format_periods(result["periods"]) if result["periods"] else "No forecast found."
+        sections.append(f"[{result['latitude']}, {result['longitude']}]\n{body}")
+    # 실패한 위치가 있으면 부분 결과가 캐시되지 않도록 전체를 오류로 반환
+    if any(result["error"] for result in results):
+        raise ToolError("\n\n".join(sections))
+    return "\n\n".join(sections)
 
 
 # MCP 서버 실행 (SSE 타입)
 if __name__ == "__main__":
-    print(f"Starting MCP server on localhost:8000")
-    print(f"Available at: http://localhost:8000/sse")
+    # PORT 환경 변수로 포트 변경 가능 (기본 8000)
+    port = int(os.getenv("PORT", mcp.settings.port))
+    print(f"Starting MCP server on localhost:{port}")
+    print(f"Available at: http://localhost:{port}/sse")
     
-    # FastMCP 서버를 SSE 모드로 실행 (기본 설정 사용)
-    mcp.run(transport="sse")
+    import uvicorn
+
+    # FastMCP SSE 앱에 공유 NWS 클라이언트 lifespan 연결 후 실행 (기본 설정 사용)
+    # (FastMCP lifespan은 SSE 세션마다 실행되므로 앱 lifespan에서 관리)
+    sse_app = mcp.sse_app()
+    sse_app.router.lifespan_context = nws_client.lifespan
+    uvicorn.run(
+        sse_app,
+        host=mcp.settings.host,
+        port=port,
+        log_level=mcp.settings.log_level.lower(),
+    )
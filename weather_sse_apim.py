@@ -1,28 +1,47 @@
 # MCP 기반 서버로 리팩토링 (APIM 호환)
-from typing import Any
-import httpx
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
 import json
 import asyncio
+import anyio
+import os
+from contextlib import asynccontextmanager, nullcontext
+import re
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+import cpu_pool
+import metrics
+import multiworker
+import nws_client
+from alerts_index import can_stream, page_alerts, stream_alerts
+from hourly_summary import summarize_hourly
+from nws_client import (
+    ALERTS_PAGE_SIZE, BATCH_MAX_LOCATIONS, make_nws_request, resolve_gridpoint, fetch_forecasts,
+    indexed_alerts, fetch_alerts_for_states, alerts_url,
+)
+from asgi_router import (
+    ASGIApp, BodyTooLarge, MessageRouter, header, read_body, send_json, send_response, session_id_from_query,
+)
+from session_registry import FORWARDED_HEADER, SESSION_OWNER_URL, SessionForwarder, create_registry
+from sse_guard import SseGuard
 
-# FastMCP 인스턴스 생성
-mcp = FastMCP("weather-mcp-server")
+# 시작 시 transport 선택: sse(기본, /sse + /messages/), streamable-http(무상태 단일 POST 엔드포인트 /mcp), both
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "sse")
+# streamable-http 응답을 SSE 스트림 대신 단일 JSON으로 반환 (progress 알림은 전송되지 않음)
+MCP_JSON_RESPONSE = os.getenv("MCP_JSON_RESPONSE", "0") == "1"
 
-NWS_API_BASE = "https://api.weather.gov"
-USER_AGENT = "weather-app/1.0"
+# FastMCP 인스턴스 생성 (streamable-http는 세션 상태 없이 동작해 어느 replica든 요청 처리 가능)
+mcp = FastMCP("weather-mcp-server", stateless_http=True, json_response=MCP_JSON_RESPONSE)
 
-async def make_nws_request(url: str) -> dict[str, Any] | None:
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "application/geo+json"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception:
-            return None
+# 워커 프로세스 수 (1보다 크면 다중 워커 모드, CPU 코어 수에 맞춰 설정)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# SSE endpoint 이벤트("data: /messages/?session_id=...")에서 세션 ID 추출
+SESSION_ID_PATTERN = re.compile(rb"session_id=([0-9a-f]+)")
+FORWARDED_HEADER_BYTES = FORWARDED_HEADER.encode()
 
 def format_alert(feature: dict) -> str:
     props = feature["properties"]
@@ -34,44 +53,137 @@ def format_alert(feature: dict) -> str:
         f"Instructions: {props.get('instruction', 'No specific instructions provided')}\n"
     )
 
+def format_alerts(features: list[dict]) -> str:
+    return "\n---\n".join(format_alert(f) for f in features)
+
+def format_periods(periods: list[dict]) -> str:
+    return "\n".join(f"{p['name']}: {p['detailedForecast']}" for p in periods)
+
 # MCP 도구로 등록
 @mcp.tool()
-async def get_alerts(state: str) -> str:
-    """Get weather alerts for a US state."""
-    url = f"{NWS_API_BASE}/alerts/active?area={state.upper()}"
-    data = await make_nws_request(url)
-    if not data or "features" not in data:
+@metrics.timed_tool
+async def get_alerts(state: str, limit: int = ALERTS_PAGE_SIZE, cursor: str | None = None,
+                     stream: bool = False, ctx: Context | None = None) -> str:
+    """Get weather alerts for a US state.
+
+    Returns at most `limit` alerts; pass the returned "Next cursor" to get the next page.
+    With `stream=true`, alerts are sent one by one as MCP progress notifications.
+    """
+    # 백그라운드 특보 인덱스가 켜져 있으면 업스트림 호출 없이 응답
+    features = indexed_alerts(states=[state.upper()])
+    if features is None:
+        url = alerts_url(state)
+        data = await make_nws_request(url)
+        # 업스트림 실패는 예외로 알려 isError 결과가 되게 함 (클라이언트 도구 캐시에 저장되지 않음)
+        if not data or "features" not in data:
+            raise ToolError("Unable to fetch alerts.")
+        features = data["features"]
+    if not features:
         return "No alerts found."
-    alerts = [format_alert(f) for f in data["features"]]
-    return "\n---\n".join(alerts) if alerts else "No alerts found."
+    # 스트리밍 요청 시 특보를 하나씩 progress 알림으로 전송 (SSE로 먼저 도착)
+    if stream and can_stream(ctx):
+        count = await stream_alerts(ctx, features, format_alert)
+        return f"Streamed {count} alerts."
+    try:
+        page, next_cursor = page_alerts(features, limit, cursor)
+    except ValueError:
+        return "Invalid cursor or limit."
+    # 특보가 많으면 포맷팅을 프로세스 풀에서 실행 (CPU_POOL_WORKERS > 0일 때)
+    result = await cpu_pool.run(format_alerts, page, offload=len(page) >= cpu_pool.CPU_POOL_MIN_ITEMS)
+    if next_cursor:
+        result += f"\n\n({len(page)}/{len(features)} alerts) Next cursor: {next_cursor}"
+    return result
+
+@mcp.tool()
+@metrics.timed_tool
+async def get_alerts_for_states(states: list[str], severities: list[str] | None = None) -> str:
+    """Get weather alerts for several US states, optionally filtered by severity."""
+    by_state = await fetch_alerts_for_states(states, severities)
+    if by_state is None:
+        raise ToolError("Unable to fetch alerts.")
+    sections = []
+    for state, features in by_state.items():
+        body = (await cpu_pool.run(format_alerts, features, offload=len(features) >= cpu_pool.CPU_POOL_MIN_ITEMS)
+                if features else "No alerts found.")
+        sections.append(f"[{state}]\n{body}")
+    return "\n\n".join(sections)
 
 @mcp.tool()
+@metrics.timed_tool
 async def get_forecast(latitude: float, longitude: float) -> str:
     """Get weather forecast for a given latitude and longitude."""
-    points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
-    points_data = await make_nws_request(points_url)
-    if not points_data or "properties" not in points_data or "forecast" not in points_data["properties"]:
-        return "No forecast found."
-    forecast_url = points_data["properties"]["forecast"]
+    gridpoint = await resolve_gridpoint(latitude, longitude)
+    if not gridpoint:
+        raise ToolError("Unable to fetch forecast data for this location.")
+    forecast_url = gridpoint["forecast"]
     data = await make_nws_request(forecast_url)
     if not data or "properties" not in data:
-        return "No forecast found."
+        raise ToolError("Unable to fetch forecast.")
     periods = data["properties"].get("periods", [])
     if not periods:
         return "No forecast found."
-    forecast = [f"{p['name']}: {p['detailedForecast']}" for p in periods]
-    return "\n".join(forecast)
+    return format_periods(periods)
+
+@mcp.tool()
+@metrics.timed_tool
+async def get_hourly_summary(latitude: float, longitude: float, days: int = 7,
+                             precip_threshold: int = 50) -> str:
+    """Get a daily summary (temperature range, wind, precipitation windows) of the hourly forecast."""
+    gridpoint = await resolve_gridpoint(latitude, longitude)
+    if not gridpoint or not gridpoint.get("forecastHourly"):
+        raise ToolError("Unable to fetch forecast data for this location.")
+    # 156시간 분량을 그대로 반환하지 않고 배열 기반으로 집계한 요약만 반환
+    data = await make_nws_request(gridpoint["forecastHourly"])
+    if not data or not data.get("properties", {}).get("periods"):
+        raise ToolError("Unable to fetch hourly forecast.")
+    return summarize_hourly(data["properties"]["periods"], days, precip_threshold)
+
+@mcp.tool()
+@metrics.timed_tool
+async def get_forecasts(locations: list[tuple[float, float]]) -> str:
+    """Get weather forecasts for several [latitude, longitude] pairs in one call."""
+    if len(locations) > BATCH_MAX_LOCATIONS:
+        return f"Too many locations (max {BATCH_MAX_LOCATIONS})."
+    # 격자 조회와 예보 조회를 제한된 동시성으로 병렬 처리 (실패한 위치만 개별 표시)
+    sections = []
+    results = await fetch_forecasts(locations)
+    for result in results:
+        body = format_periods(result["periods"]) if result["periods"] else "No forecast found."
+        sections.append(f"[{result['latitude']}, {result['longitude']}]\n{body}")
+    # 실패한 위치가 있으면 부분 결과가 캐시되지 않도록 전체를 오류로 반환
+    if any(result["error"] for result in results):
+        raise ToolError("\n\n".join(sections))
+    return "\n\n".join(sections)
+
+# APIM 호환 Starlette 앱 생성 (SSE 타입 /sse GET & /messages POST, 또는 streamable-http /mcp POST 지원)
+def create_app(transport: str = MCP_TRANSPORT, registry=None, owner_url: str = SESSION_OWNER_URL,
+               worker_id: int | None = None, worker_urls: dict[str, str] | None = None) -> Starlette:
+    """Build the APIM-compatible app.
+
+    ``registry`` maps SSE session IDs to the replica that holds the stream and
+    ``owner_url`` is this replica's internal address; when set, /messages/ POSTs
+    for sessions held elsewhere are forwarded to their owner. Several SSE-only
+    apps may share one in-process registry, e.g. to try forwarding locally.
+
+    In multi-worker mode ``worker_id`` is prefixed to the session IDs this worker
+    hands out, and POSTs for another worker's session are forwarded to its
+    internal URL in ``worker_urls``.
+    """
+    if transport not in ("sse", "streamable-http", "both"):
+        raise ValueError(f"MCP_TRANSPORT must be sse, streamable-http or both, not {transport!r}")
+    serve_sse = transport in ("sse", "both")
+    serve_streamable = transport in ("streamable-http", "both")
+    registry = registry if registry is not None else create_registry()
+    forwarder = SessionForwarder()
+    # SSE 세션별 송신 버퍼/유휴 정리/최대 세션 수 (SSE_* 환경 변수)
+    guard = SseGuard()
+    if worker_id is not None:
+        metrics.registry.const_labels = {"worker": str(worker_id)}
 
-# MCP 서버 실행 (SSE 타입, /sse GET & /messages POST 지원)
-if __name__ == "__main__":
-    import uvicorn
-    from starlette.applications import Starlette
-    from starlette.routing import Route, Mount
-    from starlette.responses import JSONResponse
-    import uuid
-    
     # FastMCP SSE 앱 가져오기
     sse_app = mcp.sse_app()
+    # streamable-http 앱을 만들어야 세션 매니저가 생성됨
+    streamable_app = mcp.streamable_http_app() if serve_streamable else None
     
     # 원본 messages mount 찾기
     messages_mount = None
@@ -80,58 +192,193 @@ if __name__ == "__main__":
             messages_mount = route
             break
     
+    # 공유 NWS 클라이언트, streamable-http 세션 매니저, 세션 레지스트리, 이벤트 루프 지연 측정은
+    # 앱 수명 동안 유지되고 종료 시 정리됨
+    @asynccontextmanager
+    async def lifespan(app):
+        async with nws_client.lifespan(app), (mcp.session_manager.run() if serve_streamable else nullcontext()):
+            metrics.loop_lag.start()
+            guard.start()
+            try:
+                yield
+            finally:
+                await guard.stop()
+                await metrics.loop_lag.stop()
+                await forwarder.aclose()
+                await registry.aclose()
+
     # 새로운 Starlette 앱 생성하여 라우팅 문제 해결
-    from starlette.middleware.cors import CORSMiddleware
-    
-    app = Starlette()
-    
-    # CORS 미들웨어 추가
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+    app = Starlette(lifespan=lifespan)
     
-    # SSE 엔드포인트를 직접 처리
+    # SSE 엔드포인트를 직접 처리 (열린 세션 수를 메트릭으로 집계)
+    local_sessions: set[str] = set()
+    metrics.registry.callback("mcp_sse_active_sessions", "Open MCP SSE sessions.", lambda: len(local_sessions))
+    sse_sessions_total = metrics.registry.counter("mcp_sse_sessions_total", "MCP SSE sessions opened.")
+    forwarded_total = metrics.registry.counter(
+        "mcp_sse_forwarded_total", "/messages/ POSTs forwarded to the replica or worker owning the session.",
+        ("hop", "result"))
+    # /sse, /messages/는 MessageRouter가 경로별 dict 조회로 바로 처리 (Starlette 라우트 탐색 생략)
+    fast_routes: dict[str, dict[str, ASGIApp]] = {}
+
     for route in sse_app.routes:
         if hasattr(route, 'path') and route.path == '/sse':
-            app.routes.append(route)
+            sse_endpoint = route.endpoint
+
+            async def handle_sse(scope, receive, send):
+                # 최대 세션 수를 넘으면 스트림을 열지 않고 거절 (클라이언트는 잠시 후 재시도)
+                if not guard.admit():
+                    return await send_json(send, 503, {"error": "Too many SSE sessions"},
+                                           [(b"retry-after", b"5")])
+                session = guard.open(send, receive)
+                session_id = None
+
+                # 첫 endpoint 이벤트에서 세션 ID를 얻어, 클라이언트가 받기 전에 레지스트리에 등록
+                async def send_event(message):
+                    nonlocal session_id
+                    if session_id is None and message["type"] == "http.response.body":
+                        body = message.get("body", b"")
+                        match = SESSION_ID_PATTERN.search(body)
+                        if match:
+                            session_id = match.group(1).decode()
+                            if worker_id is not None:
+                                # 다중 워커 모드: 세션 ID 앞에 워커 번호를 붙여 어느 워커의 세션인지 표시
+                                session_id = f"{worker_id}-{session_id}"
+                                body = body[:match.start(1)] + session_id.encode() + body[match.end(1):]
+                                message = {**message, "body": body}
+                            local_sessions.add(session_id)
+                            guard.identify(session, session_id)
+                            sse_sessions_total.inc()
+                            if owner_url:
+                                await registry.register(session_id, owner_url)
+                    # 클라이언트 소켓에는 세션 버퍼를 거쳐 별도 태스크가 전송
+                    await session.send(message)
+
+                try:
+                    # 응답은 SSE 스트림으로 이미 전송되므로 FastMCP가 반환하는 빈 Response는 버림
+                    await sse_endpoint(Request(scope, session.receive, send_event))
+                finally:
+                    await guard.release(session)
+                    if session_id is not None:
+                        local_sessions.discard(session_id)
+                        if owner_url:
+                            await registry.unregister(session_id)
+
+            if serve_sse:
+                fast_routes["/sse"] = {"GET": handle_sse}
             break
-    
-    # /messages/ 엔드포인트를 쿼리 파라미터로 처리하도록 새로 생성
-    async def handle_messages(request):
+
+    # 원본 messages mount의 앱은 SseServerTransport.handle_post_message (순수 ASGI)
+    post_message = messages_mount.app if messages_mount and hasattr(messages_mount, 'app') else None
+    max_body_size = mcp.settings.max_request_body_size
+
+    # /messages/?session_id=... POST 처리: 세션을 가진 워커/replica로 전달하거나 원본 앱에 그대로 넘김
+    async def handle_messages(scope, receive, send):
         """Handle /messages/ POST requests with session_id query parameter"""
-        session_id = request.query_params.get('session_id')
+        session_id = session_id_from_query(scope["query_string"])
         if not session_id:
-            return JSONResponse({"error": "session_id required"}, status_code=400)
-        
-        # 원본 messages mount의 앱에 요청 전달
-        if messages_mount and hasattr(messages_mount, 'app'):
-            # 새로운 scope 생성 (session_id를 path_info에 포함)
-            new_scope = dict(request.scope)
-            new_scope['path'] = f'/messages/{session_id}'
-            new_scope['path_info'] = f'/messages/{session_id}'
-            
+            return await send_json(send, 400, {"error": "session_id required"})
+
+        async def forward(owner, hop):
+            # 전달할 때만 본문을 모아 읽음 (로컬 세션은 본문을 원본 앱으로 그대로 스트리밍)
             try:
-                # 원본 messages 앱에 요청 전달
-                response = await messages_mount.app(new_scope, request.receive, request._send)
-                return response
-            except Exception as e:
-                print(f"[ERROR] Messages handler error: {e}")
-                return JSONResponse({"error": str(e)}, status_code=500)
-        else:
-            return JSONResponse({"error": "Messages handler not available"}, status_code=503)
+                body = await read_body(receive, max_body_size)
+            except BodyTooLarge:
+                return await send_json(send, 413, {"error": "Request body too large"})
+            content_type = header(scope, b"content-type")
+            result = await forwarder.forward(owner, session_id, body,
+                                             content_type.decode("latin-1") if content_type else None, hop)
+            if result is None:
+                forwarded_total.inc(hop, "unreachable")
+                return await send_json(send, 502, {"error": "Session owner unreachable"})
+            forwarded_total.inc(hop, "ok")
+            status, body, content_type = result
+            await send_response(send, status, body, content_type)
+
+        inner_id = session_id
+        if worker_urls or owner_url:
+            forwarded = header(scope, FORWARDED_HEADER_BYTES)
+            # 다중 워커 모드: 다른 워커의 세션이면 그 워커의 내부 포트로 전달
+            worker, _, inner_id = session_id.rpartition("-")
+            if (worker_urls and worker in worker_urls and worker != str(worker_id)
+                    and forwarded != b"worker"):
+                return await forward(worker_urls[worker], "worker")
+
+            # 다른 replica가 가진 세션이면 그 replica로 전달 (이미 전달된 요청은 다시 전달하지 않음)
+            if owner_url and session_id not in local_sessions and forwarded is None:
+                owner = await registry.lookup(session_id)
+                if owner and owner != owner_url:
+                    return await forward(owner, "replica")
+        elif worker_id is not None:
+            inner_id = session_id.rpartition("-")[2]
+
+        # 클라이언트 활동으로 기록해 유휴 정리 대상에서 제외
+        guard.touch(session_id)
+        if post_message is None:
+            return await send_json(send, 503, {"error": "Messages handler not available"})
+        # 워커 번호를 뗀 원래 session_id로 원본 앱 호출 (그 외에는 scope를 복사하지 않음)
+        if inner_id != session_id:
+            scope = {**scope, "query_string": b"session_id=" + inner_id.encode()}
+        try:
+            await post_message(scope, receive, send)
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            # 202 응답 직후 세션이 닫힌 경우 (클라이언트 종료나 유휴/느린 소비자 정리) - 전달할 곳이 없음
+            pass
     
     # /messages/ 라우트 추가
-    app.routes.append(Route("/messages/", handle_messages, methods=["POST"]))
-    
+    if serve_sse:
+        fast_routes["/messages/"] = {"POST": handle_messages}
+        fast_routes["/messages"] = {"POST": handle_messages}
+
+    # streamable-http 엔드포인트 (/mcp) 추가 - 요청마다 독립적으로 처리되므로 세션 고정(sticky) 불필요
+    if serve_streamable:
+        for route in streamable_app.routes:
+            if hasattr(route, 'path') and route.path == mcp.settings.streamable_http_path:
+                app.routes.append(route)
+                break
+
+    # deployment.yaml의 liveness/readiness probe와 Prometheus 수집용 엔드포인트
+    async def handle_health(request):
+        healthy, details = metrics.health()
+        details["active_sessions"] = len(local_sessions)
+        return JSONResponse(details, status_code=200 if healthy else 503)
+
+    async def handle_metrics(request):
+        text = metrics.registry.render()
+        # 다중 워커 모드: 어느 워커가 받든 모든 워커의 메트릭을 worker 라벨로 합쳐 반환
+        if worker_urls and "local" not in request.query_params:
+            others = await asyncio.gather(*(forwarder.get_text(f"{url}/metrics?local=1")
+                                            for worker, url in worker_urls.items() if worker != str(worker_id)))
+            text = metrics.merge([text, *(other for other in others if other)])
+        return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+    app.routes.append(Route("/health", handle_health, methods=["GET"]))
+    app.routes.append(Route("/metrics", handle_metrics, methods=["GET"]))
+
+    # 나중에 추가한 미들웨어가 바깥쪽: MessageRouter -> CORS -> Starlette 라우팅
+    # (MessageRouter가 처리하는 요청은 CORS 헤더를 직접 붙이고, preflight는 CORS 미들웨어로 넘김)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(MessageRouter, routes=fast_routes, cors=True)
+    app.state.fast_routes = fast_routes
+    return app
+
+
+# MCP 서버 실행
+if __name__ == "__main__":
+    import uvicorn
+
+    sse_app = create_app()
     print("[DEBUG] Created new app with proper /messages/ routing")
-    sse_app = app
     
-    print("Starting Weather MCP Server on 0.0.0.0:8000 (APIM Compatible)")
-    print("Tools:", ", ".join([tool.__name__ for tool in [get_alerts, get_forecast]]))
+    # deployment.yaml의 PORT 환경 변수 사용 (기본 8000)
+    port = int(os.getenv("PORT", "8000"))
+    print(f"Starting Weather MCP Server on 0.0.0.0:{port} (APIM Compatible, {WEB_CONCURRENCY} worker(s))")
+    print("Tools:", ", ".join([tool.__name__ for tool in [get_alerts, get_alerts_for_states, get_forecast, get_forecasts, get_hourly_summary]]))
     
     # 현재 SSE 앱의 라우트 확인 및 지원 엔드포인트 출력
     print("\n=== SSE App Routes ===")
@@ -152,11 +399,22 @@ if __name__ == "__main__":
                         supported_endpoints.append("POST /messages/ (MCP protocol)")
                     elif route.path == '/messages/' and method == 'POST':
                         supported_endpoints.append("POST /messages/ (MCP protocol)")
+                    elif route.path in ('/health', '/metrics') and method == 'GET':
+                        supported_endpoints.append(f"GET {route.path}")
             else:
                 # Mount나 다른 타입의 라우트 처리
                 if route.path == '/messages':
                     supported_endpoints.append("POST /messages/ (MCP protocol)")
+                elif route.path == mcp.settings.streamable_http_path:
+                    supported_endpoints.append(f"POST {route.path} (MCP streamable HTTP, stateless)")
     
+    # MessageRouter가 직접 처리하는 엔드포인트
+    for path, methods in sse_app.state.fast_routes.items():
+        if path == '/sse':
+            supported_endpoints.append("GET /sse (SSE streaming)")
+        elif path == '/messages/':
+            supported_endpoints.append("POST /messages/ (MCP protocol)")
+
     print(f"\n=== Supported Endpoints ===")
     for endpoint in supported_endpoints:
         print(f"  - {endpoint}")
@@ -164,10 +422,19 @@ if __name__ == "__main__":
     if not supported_endpoints:
         print("  - No supported endpoints detected")
     
-    print("Features: FastMCP-based SSE transport")
+    print(f"Features: FastMCP-based {MCP_TRANSPORT} transport")
     
-    uvicorn.run(
-        sse_app, 
-        host="0.0.0.0", 
-        port=8000
-    )
\ No newline at end of file
+    if WEB_CONCURRENCY > 1:
+        # 워커마다 앱을 새로 만들고, SSE 세션은 세션 ID의 워커 번호로 해당 워커에 전달
+        multiworker.serve(
+            lambda worker_id, worker_urls: create_app(worker_id=worker_id, worker_urls=worker_urls),
+            host="0.0.0.0",
+            port=port,
+            workers=WEB_CONCURRENCY,
+        )
+    else:
+        uvicorn.run(
+            sse_app, 
+            host="0.0.0.0", 
+            port=port
+        )
\ No newline at end of file
@@ -0,0 +1,203 @@
+# 미리 띄워 둔 stdio MCP 서버 프로세스(McpWorkbench)를 여러 에이전트 실행에 빌려주는 풀
+#
+# McpWorkbench를 실행마다 새로 만들면 매번 인터프리터 시작, mcp/httpx import, MCP 핸드셰이크 비용을
+# 치릅니다. 풀은 N개의 워크벤치를 미리 시작해 두고 lease()로 빌려주며, 오래 쉬었거나 마지막 도구
+# 호출이 실패한 워크벤치는 빌려주기 전에 상태를 확인하고, 일정 횟수 이상 도구를 호출한 워크벤치는
+# 새 프로세스로 교체합니다.
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Mapping
+import asyncio
+import os
+import time
+from autogen_core import CancellationToken
+from autogen_core.tools import ToolResult, ToolSchema
+from autogen_ext.tools.mcp import McpServerParams, McpWorkbench
+
+# 미리 띄워 둘 서버 프로세스 수 (동시에 실행할 에이전트 수만큼)
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+# 이 횟수만큼 도구를 호출한 프로세스는 새로 교체 (0이면 교체하지 않음)
+MCP_POOL_MAX_CALLS = int(os.getenv("MCP_POOL_MAX_CALLS", "500"))
+# 이 시간(초) 이상 쉬었던 프로세스는 빌려주기 전에 list_tools로 응답 여부 확인
+MCP_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_POOL_HEALTH_CHECK_INTERVAL", "30"))
+MCP_POOL_HEALTH_CHECK_TIMEOUT = float(os.getenv("MCP_POOL_HEALTH_CHECK_TIMEOUT", "5"))
+
+# 교체용 프로세스 시작 실패 시 재시도 간격(초)
+RESPAWN_DELAY = 1.0
+
+
+class PooledMcpWorkbench(McpWorkbench):
+    """McpWorkbench owned by a pool: list_tools() comes from the pool's cache and tool calls are counted.
+
+    Liveness is tracked here rather than read from McpWorkbench internals: a
+    workbench whose last tool call failed is marked suspect and must answer a
+    list_tools request before it is leased again.
+    """
+
+    def __init__(self, server_params: McpServerParams, pool: "McpWorkbenchPool"):
+        super().__init__(server_params=server_params)
+        self._pool = pool
+        self.calls = 0
+        self.last_used = time.monotonic()
+        self.started = False
+        # 도구 호출이 실패하면 True (McpWorkbench는 연결 오류도 is_error 결과로 돌려주므로 구분할 수 없음)
+        self.suspect = False
+
+    @property
+    def alive(self) -> bool:
+        return self.started and not self.suspect
+
+    async def start(self) -> None:
+        await super().start()
+        self.started = True
+
+    async def stop(self) -> None:
+        """Stop the server process; safe to call more than once and on a workbench that failed to start."""
+        if not self.started:
+            return
+        self.started = False
+        try:
+            await super().stop()
+        except Exception:
+            pass
+
+    close = stop
+
+    async def list_tools(self) -> List[ToolSchema]:
+        if self._pool.tools is None:
+            self._pool.tools = await super().list_tools()
+        return list(self._pool.tools)
+
+    async def call_tool(self, name: str, arguments: Mapping[str, Any] | None = None,
+                        cancellation_token: CancellationToken | None = None, call_id: str | None = None) -> ToolResult:
+        self.calls += 1
+        try:
+            result = await super().call_tool(name, arguments, cancellation_token, call_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.suspect = True
+            raise
+        if result.is_error:
+            self.suspect = True
+        return result
+
+    async def check(self, timeout: float) -> bool:
+        """Return True if the server process still answers a list_tools request."""
+        if not self.started:
+            return False
+        try:
+            await asyncio.wait_for(super().list_tools(), timeout)
+        except Exception:
+            return False
+        self.suspect = False
+        return True
+
+
+class McpWorkbenchPool:
+    """Pool of started stdio McpWorkbench instances leased to concurrent agent runs.
+
+    Use ``async with pool.lease() as workbench`` and hand ``workbench`` to an
+    agent; it goes back to the pool when the block exits.
+    """
+
+    def __init__(self, server_params: McpServerParams, size: int = MCP_POOL_SIZE,
+                 max_calls: int = MCP_POOL_MAX_CALLS,
+                 health_check_interval: float = MCP_POOL_HEALTH_CHECK_INTERVAL,
+                 health_check_timeout: float = MCP_POOL_HEALTH_CHECK_TIMEOUT):
+        if size < 1:
+            raise ValueError("MCP_POOL_SIZE must be at least 1")
+        self.server_params = server_params
+        self.size = size
+        self.max_calls = max_calls
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        # 모든 프로세스가 같은 서버이므로 도구 목록은 한 번만 조회해 공유
+        self.tools: List[ToolSchema] | None = None
+        self._idle: asyncio.Queue[PooledMcpWorkbench] = asyncio.Queue()
+        self._respawns: set[asyncio.Task] = set()
+        self._closed = False
+        self.spawned = 0
+        self.recycled = 0
+
+    async def __aenter__(self) -> "McpWorkbenchPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def _spawn(self) -> PooledMcpWorkbench:
+        workbench = PooledMcpWorkbench(self.server_params, self)
+        await workbench.start()
+        self.spawned += 1
+        if self.tools is None:
+            await workbench.list_tools()
+        return workbench
+
+    async def start(self) -> None:
+        """Start all server processes in parallel."""
+        for workbench in await asyncio.gather(*(self._spawn() for _ in range(self.size))):
+            self._idle.put_nowait(workbench)
+
+    async def _respawn(self) -> None:
+        while not self._closed:
+            try:
+                workbench = await self._spawn()
+            except Exception as e:
+                print(f"[WARN] MCP workbench respawn failed: {e}")
+                await asyncio.sleep(RESPAWN_DELAY)
+                continue
+            if self._closed:
+                await workbench.close()
+            else:
+                self._idle.put_nowait(workbench)
+            return
+
+    def _replace(self, workbench: PooledMcpWorkbench) -> None:
+        """Stop ``workbench`` and start a fresh process for its slot in the background."""
+        self.recycled += 1
+
+        async def replace() -> None:
+            await workbench.close()
+            await self._respawn()
+
+        task = asyncio.create_task(replace())
+        self._respawns.add(task)
+        task.add_done_callback(self._respawns.discard)
+
+    async def _acquire(self) -> PooledMcpWorkbench:
+        while True:
+            workbench = await self._idle.get()
+            # 마지막 도구 호출이 실패했거나 오래 쉬었던 프로세스만 실제로 응답하는지 확인
+            if workbench.alive and time.monotonic() - workbench.last_used < self.health_check_interval:
+                healthy = True
+            else:
+                healthy = await workbench.check(self.health_check_timeout)
+            if healthy:
+                return workbench
+            self._replace(workbench)
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[PooledMcpWorkbench]:
+        """Borrow a started workbench, waiting if all of them are in use."""
+        if self._closed:
+            raise RuntimeError("McpWorkbenchPool is stopped")
+        workbench = await self._acquire()
+        try:
+            yield workbench
+        finally:
+            workbench.last_used = time.monotonic()
+            if self._closed:
+                await workbench.close()
+            elif not workbench.started or (self.max_calls and workbench.calls >= self.max_calls):
+                self._replace(workbench)
+            else:
+                self._idle.put_nowait(workbench)
+
+    async def stop(self) -> None:
+        """Stop every idle process and wait for pending respawns; leased ones stop when returned."""
+        self._closed = True
+        # 진행 중인 교체는 새 프로세스를 바로 종료하고 끝나므로 기다림 (프로세스가 남지 않도록)
+        await asyncio.gather(*self._respawns, return_exceptions=True)
+        while not self._idle.empty():
+            await self._idle.get_nowait().close()